@@ -0,0 +1,43 @@
+"""Add appointment listing indexes
+
+Revision ID: 3c7d9a1f4b2e
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7d9a1f4b2e'
+down_revision: Union[str, Sequence[str], None] = 'e1f2a3b4c5d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination on (appointment_date, appointment_time, id),
+    # optionally narrowed by doctor or status
+    op.create_index(
+        'ix_appointments_listing', 'appointments',
+        ['appointment_date', 'appointment_time', 'id']
+    )
+    op.create_index(
+        'ix_appointments_doctor_listing', 'appointments',
+        ['doctor_id', 'appointment_date', 'appointment_time', 'id']
+    )
+    op.create_index(
+        'ix_appointments_status_listing', 'appointments',
+        ['status', 'appointment_date', 'appointment_time', 'id']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_appointments_status_listing', table_name='appointments')
+    op.drop_index('ix_appointments_doctor_listing', table_name='appointments')
+    op.drop_index('ix_appointments_listing', table_name='appointments')
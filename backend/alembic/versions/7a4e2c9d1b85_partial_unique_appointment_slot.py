@@ -0,0 +1,49 @@
+"""Make unique_appointment a partial unique index
+
+Revision ID: 7a4e2c9d1b85
+Revises: 3c7d9a1f4b2e
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4e2c9d1b85'
+down_revision: Union[str, Sequence[str], None] = '3c7d9a1f4b2e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _unique_constraint_exists() -> bool:
+    constraints = sa.inspect(op.get_bind()).get_unique_constraints('appointments')
+    return any(constraint['name'] == 'unique_appointment' for constraint in constraints)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # database/init.sql created unique_appointment as a plain UNIQUE constraint,
+    # which also blocked rebooking a cancelled slot. SQLite cannot drop a
+    # constraint in place; batch mode recreates the table without it.
+    if _unique_constraint_exists():
+        with op.batch_alter_table('appointments') as batch_op:
+            batch_op.drop_constraint('unique_appointment', type_='unique')
+    op.create_index(
+        'unique_appointment', 'appointments',
+        ['doctor_id', 'appointment_date', 'appointment_time'],
+        unique=True,
+        postgresql_where=sa.text("status != 'cancelled'"),
+        sqlite_where=sa.text("status != 'cancelled'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('unique_appointment', table_name='appointments')
+    with op.batch_alter_table('appointments') as batch_op:
+        batch_op.create_unique_constraint(
+            'unique_appointment', ['doctor_id', 'appointment_date', 'appointment_time']
+        )
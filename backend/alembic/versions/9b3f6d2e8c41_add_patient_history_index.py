@@ -0,0 +1,32 @@
+"""Add patient history index on appointments
+
+Revision ID: 9b3f6d2e8c41
+Revises: 7a4e2c9d1b85
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3f6d2e8c41'
+down_revision: Union[str, Sequence[str], None] = '7a4e2c9d1b85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (doctor_id, appointment_date, appointment_time) is already covered by
+    # ix_appointments_doctor_listing and the partial unique_appointment index
+    op.create_index(
+        'ix_appointments_patient_history', 'appointments',
+        ['patient_id', 'appointment_date']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_appointments_patient_history', table_name='appointments')
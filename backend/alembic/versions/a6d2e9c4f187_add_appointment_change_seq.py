@@ -0,0 +1,60 @@
+"""Add commit-ordered appointments.change_seq for delta sync
+
+Revision ID: a6d2e9c4f187
+Revises: f3c8a5d1b720
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d2e9c4f187'
+down_revision: Union[str, Sequence[str], None] = 'f3c8a5d1b720'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Timestamp columns the application writes as naive UTC (datetime.utcnow)
+TIMESTAMP_COLUMNS = (
+    ('patients', 'created_at'),
+    ('doctors', 'created_at'),
+    ('services', 'created_at'),
+    ('appointments', 'created_at'),
+    ('appointments', 'updated_at'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows start at 0; clients holding an (updated_at, id) cursor are
+    # served by updated_at once and continue with change_seq cursors
+    op.add_column('appointments', sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+    op.drop_index('ix_appointments_changes', table_name='appointments')
+    op.create_index('ix_appointments_changes', 'appointments', ['change_seq', 'id'])
+    # since=<ISO time> and legacy cursors still filter on updated_at
+    op.create_index('ix_appointments_updated_at', 'appointments', ['updated_at'])
+    op.create_table(
+        'appointment_change_counter',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # init.sql defaults used server-local time; SQLite's CURRENT_TIMESTAMP is already UTC
+    if op.get_bind().dialect.name == 'postgresql':
+        for table, column in TIMESTAMP_COLUMNS:
+            op.alter_column(table, column, server_default=sa.text("(CURRENT_TIMESTAMP AT TIME ZONE 'UTC')"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        for table, column in TIMESTAMP_COLUMNS:
+            op.alter_column(table, column, server_default=sa.text('CURRENT_TIMESTAMP'))
+    op.drop_table('appointment_change_counter')
+    op.drop_index('ix_appointments_updated_at', table_name='appointments')
+    op.drop_index('ix_appointments_changes', table_name='appointments')
+    op.create_index('ix_appointments_changes', 'appointments', ['updated_at', 'id'])
+    op.drop_column('appointments', 'change_seq')
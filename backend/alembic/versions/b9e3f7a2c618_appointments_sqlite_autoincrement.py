@@ -0,0 +1,71 @@
+"""Never reuse appointment ids on SQLite
+
+Archived appointments whose id was already handed out again to a live
+appointment get a new id (above every existing id). The live rows keep
+their ids, so links and change feed cursors stay valid; the archived copy
+was already unreachable through /api/appointments/{id}, which returned the
+live row for that id.
+
+Revision ID: b9e3f7a2c618
+Revises: a6d2e9c4f187
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e3f7a2c618'
+down_revision: Union[str, Sequence[str], None] = 'a6d2e9c4f187'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _max_id(bind) -> int:
+    return max(
+        bind.scalar(sa.text("SELECT COALESCE(MAX(id), 0) FROM appointments")),
+        bind.scalar(sa.text("SELECT COALESCE(MAX(id), 0) FROM appointments_archive")),
+    )
+
+
+def _renumber_reused_ids(bind) -> None:
+    """Archived rows sharing an id with a live row move to fresh ids; live rows keep theirs"""
+    reused = bind.scalars(sa.text(
+        "SELECT id FROM appointments_archive WHERE id IN (SELECT id FROM appointments) ORDER BY id"
+    )).all()
+    next_id = _max_id(bind) + 1
+    for offset, old_id in enumerate(reused):
+        bind.execute(
+            sa.text("UPDATE appointments_archive SET id = :new_id WHERE id = :old_id"),
+            {"new_id": next_id + offset, "old_id": old_id},
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # PostgreSQL SERIAL ids come from a sequence and are never reused
+    if bind.dialect.name != 'sqlite':
+        return
+    _renumber_reused_ids(bind)
+    with op.batch_alter_table('appointments', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': True}):
+        pass
+    # Start after every id handed out so far, archived ones included
+    bind.execute(sa.text("DELETE FROM sqlite_sequence WHERE name = 'appointments'"))
+    bind.execute(
+        sa.text("INSERT INTO sqlite_sequence (name, seq) VALUES ('appointments', :seq)"),
+        {"seq": _max_id(bind)},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('appointments', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': False}):
+        pass
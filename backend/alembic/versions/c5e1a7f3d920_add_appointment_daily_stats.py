@@ -0,0 +1,50 @@
+"""Add appointment_daily_stats rollup table
+
+Revision ID: c5e1a7f3d920
+Revises: 9b3f6d2e8c41
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e1a7f3d920'
+down_revision: Union[str, Sequence[str], None] = '9b3f6d2e8c41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'appointment_daily_stats',
+        sa.Column('appointment_date', sa.Date(), nullable=False),
+        sa.Column('doctor_id', sa.Integer(), nullable=False),
+        sa.Column('service_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('appointment_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['service_id'], ['services.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('appointment_date', 'doctor_id', 'service_id', 'status')
+    )
+    # Backfill from existing appointments
+    op.execute("""
+        INSERT INTO appointment_daily_stats
+            (appointment_date, doctor_id, service_id, status, appointment_count, revenue)
+        SELECT a.appointment_date, a.doctor_id, a.service_id, COALESCE(a.status, 'scheduled'),
+               COUNT(*), COALESCE(SUM(s.price), 0)
+        FROM appointments a
+        LEFT JOIN services s ON s.id = a.service_id
+        WHERE a.service_id IS NOT NULL
+        GROUP BY a.appointment_date, a.doctor_id, a.service_id, COALESCE(a.status, 'scheduled')
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('appointment_daily_stats')
@@ -0,0 +1,34 @@
+"""Add appointments.updated_at for delta sync
+
+Revision ID: d8a2f4c6b137
+Revises: c5e1a7f3d920
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8a2f4c6b137'
+down_revision: Union[str, Sequence[str], None] = 'c5e1a7f3d920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('appointments', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    # Existing rows count as last modified when they were created
+    op.execute("UPDATE appointments SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)")
+    with op.batch_alter_table('appointments') as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+    op.create_index('ix_appointments_changes', 'appointments', ['updated_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_appointments_changes', table_name='appointments')
+    op.drop_column('appointments', 'updated_at')
@@ -0,0 +1,65 @@
+"""Add patients.search_text and a trigram index for patient search
+
+Revision ID: e4b7c1d9a352
+Revises: d8a2f4c6b137
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from textnorm import build_search_text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7c1d9a352'
+down_revision: Union[str, Sequence[str], None] = 'd8a2f4c6b137'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('patients', sa.Column('search_text', sa.Text(), nullable=False, server_default=''))
+
+    # Backfill with the same normalization the application uses
+    bind = op.get_bind()
+    patients = sa.table(
+        'patients',
+        sa.column('id', sa.Integer), sa.column('first_name', sa.String), sa.column('last_name', sa.String),
+        sa.column('email', sa.String), sa.column('phone', sa.String), sa.column('search_text', sa.Text),
+    )
+    update = patients.update().where(patients.c.id == sa.bindparam('patient_id')).values(
+        search_text=sa.bindparam('text')
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(patients.c.id, patients.c.first_name, patients.c.last_name, patients.c.email, patients.c.phone)
+            .where(patients.c.id > last_id).order_by(patients.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(update, [
+            {'patient_id': row.id, 'text': build_search_text(row.first_name, row.last_name, row.email, row.phone)}
+            for row in rows
+        ])
+        last_id = rows[-1].id
+
+    if bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            'ix_patients_search_trgm', 'patients', ['search_text'],
+            postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_patients_search_trgm', table_name='patients')
+    op.drop_column('patients', 'search_text')
@@ -0,0 +1,58 @@
+"""Add appointments_archive for past appointments
+
+Revision ID: f3c8a5d1b720
+Revises: e4b7c1d9a352
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c8a5d1b720'
+down_revision: Union[str, Sequence[str], None] = 'e4b7c1d9a352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filled by `python manage.py archive-appointments`
+    op.create_table(
+        'appointments_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('patient_id', sa.Integer(), nullable=False),
+        sa.Column('doctor_id', sa.Integer(), nullable=False),
+        sa.Column('service_id', sa.Integer(), nullable=False),
+        sa.Column('appointment_date', sa.Date(), nullable=False),
+        sa.Column('appointment_time', sa.Time(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['service_id'], ['services.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_appointments_archive_patient_history', 'appointments_archive',
+        ['patient_id', 'appointment_date'], unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Move archived rows back before the table goes away
+    op.execute(
+        'INSERT INTO appointments (id, patient_id, doctor_id, service_id, appointment_date, appointment_time, '
+        'status, notes, created_at, updated_at) '
+        'SELECT id, patient_id, doctor_id, service_id, appointment_date, appointment_time, '
+        'status, notes, created_at, updated_at FROM appointments_archive'
+    )
+    op.drop_index('ix_appointments_archive_patient_history', table_name='appointments_archive')
+    op.drop_table('appointments_archive')
@@ -0,0 +1,92 @@
+"""Geçmiş randevuların arşivlenmesi.
+
+appointments tablosu yalnızca güncel çalışma kümesini tutar; randevu
+tarihi ARCHIVE_AFTER_DAYS günden eski olanlar aynı sütunlara sahip
+appointments_archive tablosuna taşınır. Müsaitlik, çakışma kontrolü, admin
+listesi ve değişiklik akışı yalnızca appointments'ı okur. Hasta geçmişi
+(/api/appointments/patient/{id}, /email/{email}) iki tabloyu tek sorguda
+okur, tek randevu sorgusu bulamadığı id'ye arşivde bakar. Panel
+istatistikleri özet tablodan geldiği için taşımadan etkilenmez. Randevu
+id'leri iki tablo genelinde benzersizdir; SQLite'ta appointments bu yüzden
+AUTOINCREMENT ile oluşturulur (en büyük id arşivlense de tekrar verilmez).
+
+Taşıma id sırasıyla partiler halinde yapılır; her parti kendi
+transaction'ında kopyalanıp silinir. İş yarıda kesilirse aynı komut
+kaldığı yerden devam eder:
+
+    python manage.py archive-appointments [--days 365] [--batch-size 1000] [--max-batches N]
+"""
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional
+import os
+
+from sqlalchemy import DateTime, delete, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+
+import models
+import serialization
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+# Columns copied as-is; archived_at is set by the job
+COLUMNS = (
+    "id", "patient_id", "doctor_id", "service_id", "appointment_date", "appointment_time",
+    "status", "notes", "created_at", "updated_at",
+)
+
+
+def cutoff(days: int = ARCHIVE_AFTER_DAYS, today: Optional[date] = None) -> date:
+    """Bu tarihten önceki randevular arşivlenir"""
+    return (today or date.today()) - timedelta(days=days)
+
+
+def archive_batch(db: Session, before: date, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """before'dan önceki en fazla batch_size randevuyu taşır ve commit eder; taşınan sayısını döner"""
+    appointment = models.Appointment.__table__
+    archived = models.ArchivedAppointment.__table__
+    ids = db.scalars(
+        select(appointment.c.id)
+        .where(appointment.c.appointment_date < before)
+        .order_by(appointment.c.id)
+        .limit(batch_size)
+        # A second job (or a status update) never sees half of a batch
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        return 0
+
+    db.execute(insert(archived).from_select(
+        [*COLUMNS, "archived_at"],
+        select(
+            *(appointment.c[name] for name in COLUMNS),
+            literal(datetime.utcnow(), DateTime),
+        ).where(appointment.c.id.in_(ids)),
+    ))
+    db.execute(delete(appointment).where(appointment.c.id.in_(ids)))
+    db.commit()
+    return len(ids)
+
+
+def archive(db: Session, before: date, batch_size: int = ARCHIVE_BATCH_SIZE,
+            max_batches: Optional[int] = None, progress: Optional[Callable[[int], None]] = None) -> int:
+    """before'dan önceki randevuları partiler halinde taşır; toplam taşınan sayısını döner"""
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = archive_batch(db, before, batch_size)
+        if not count:
+            break
+        moved += count
+        batches += 1
+        if progress:
+            progress(moved)
+    return moved
+
+
+def patient_history_query(patient_id: int):
+    """Hastanın güncel ve arşivlenmiş randevuları tek sorguda (UNION ALL), sütun satırları olarak"""
+    history = union_all(*(
+        serialization.appointment_rows_query(table).where(table.patient_id == patient_id)
+        for table in (models.Appointment, models.ArchivedAppointment)
+    ))
+    return history.order_by(history.selected_columns.appointment_date.desc())
@@ -1,7 +1,15 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
 
 # Secret key for JWT encoding/decoding
 # In production, this should be stored in environment variables
@@ -17,6 +25,71 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# Password hashing is CPU bound (pbkdf2), so it runs in a small process pool
+# instead of the request threadpool. Calls beyond the admission limit are
+# refused rather than queued.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+
+class HashingOverloaded(Exception):
+    pass
+
+_hash_executor: Optional[ProcessPoolExecutor] = None
+_hash_pending = 0
+_hash_lock = threading.Lock()
+
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    with _hash_lock:
+        if _hash_executor is None:
+            _hash_executor = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _hash_executor
+
+def _discard_hash_executor(executor: ProcessPoolExecutor) -> None:
+    """Kırılmış havuzu bırakır; bir sonraki çağrı yenisini açar"""
+    global _hash_executor
+    with _hash_lock:
+        # Another request may already have replaced it
+        if _hash_executor is executor:
+            _hash_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+async def _run_hashing(func, *args):
+    global _hash_pending
+    with _hash_lock:
+        if _hash_pending >= PASSWORD_HASH_MAX_PENDING:
+            raise HashingOverloaded()
+        _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        # A dead worker (OOM kill, crash) breaks the pool for good; retry once on a new one
+        for _ in range(2):
+            executor = _get_hash_executor()
+            try:
+                return await loop.run_in_executor(executor, func, *args)
+            except BrokenProcessPool:
+                _discard_hash_executor(executor)
+        raise HashingOverloaded()
+    finally:
+        with _hash_lock:
+            _hash_pending -= 1
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await _run_hashing(get_password_hash, password)
+
+def shutdown_hash_executor():
+    global _hash_executor
+    with _hash_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=False, cancel_futures=True)
+            _hash_executor = None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -26,3 +99,62 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+
+class TokenCache:
+    """Doğrulanmış JWT'ler için LRU: token -> (kullanıcı adı, son geçerlilik)"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, username: str, expires_at: float) -> None:
+        with self._lock:
+            self._entries[token] = (username, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+token_cache = TokenCache(int(os.getenv("TOKEN_CACHE_SIZE", "1024")))
+
+def decode_access_token(token: str) -> Optional[str]:
+    """Token geçerliyse kullanıcı adını döndürür; yakın zamanda doğrulananlar önbellekten gelir"""
+    username = token_cache.get(token)
+    if username is not None:
+        return username
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    username = payload.get("sub")
+    if username is None or "exp" not in payload:
+        return None
+    token_cache.put(token, username, float(payload["exp"]))
+    return username
@@ -0,0 +1,307 @@
+"""Müsaitlik hesaplama motoru.
+
+Bir veya birden fazla doktorun tarih aralığındaki dolu randevuları tek bir
+sorguyla çekilir. Her doktor/gün için randevular hizmet süresine göre
+sıralı aralık listesine (DayOccupancy) dönüştürülür; boş slotlar önceden
+hesaplanmış slot ızgarası üzerinde bit maskeleriyle bulunur.
+"""
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import threading
+
+from sqlalchemy import literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+
+# Working hours: 09:00 - 18:00, 30 minute slots
+WORKING_HOURS_START = time(9, 0)
+WORKING_HOURS_END = time(18, 0)
+SLOT_MINUTES = 30
+
+
+def _build_slot_grid() -> Tuple[time, ...]:
+    current = datetime.combine(date.min, WORKING_HOURS_START)
+    end = datetime.combine(date.min, WORKING_HOURS_END)
+    slots = []
+    while current < end:
+        slots.append(current.time())
+        current += timedelta(minutes=SLOT_MINUTES)
+    return tuple(slots)
+
+
+# Slot grid shared by every doctor and day
+SLOT_GRID = _build_slot_grid()
+SLOT_LABELS = tuple(slot.strftime("%H:%M") for slot in SLOT_GRID)
+FULL_MASK = (1 << len(SLOT_GRID)) - 1
+
+
+def minute_of_day(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+GRID_START = minute_of_day(WORKING_HOURS_START)
+
+
+class DayOccupancy:
+    """Bir doktorun bir gündeki dolu aralıkları (dakika cinsinden, yarı açık).
+
+    Aralıklar sıralanıp birleştirilerek saklanır; böylece bir aralığın
+    çakışıp çakışmadığı ikili arama ile O(log n) sürede bulunur.
+    """
+
+    __slots__ = ("starts", "ends", "_mask")
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()):
+        merged: List[List[int]] = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+        self._mask: Optional[int] = None
+
+    def overlaps(self, start: int, end: int) -> bool:
+        # Intervals [0, i) begin before `end`; only the last of them can reach `start`
+        i = bisect_left(self.starts, end)
+        return i > 0 and self.ends[i - 1] > start
+
+    @property
+    def mask(self) -> int:
+        """Herhangi bir randevuyla kesişen ızgara slotlarının bit maskesi"""
+        if self._mask is None:
+            mask = 0
+            for start, end in zip(self.starts, self.ends):
+                first = max(0, (start - GRID_START) // SLOT_MINUTES)
+                last = min(len(SLOT_GRID), -(-(end - GRID_START) // SLOT_MINUTES))
+                if first < last:
+                    mask |= ((1 << (last - first)) - 1) << first
+            self._mask = mask
+        return self._mask
+
+
+EMPTY_DAY = DayOccupancy()
+
+
+class OccupancyCache:
+    """(doctor_id, gün) -> DayOccupancy için sınırlı LRU önbellek.
+
+    Randevu yazan uç noktalar ilgili anahtarı geçersiz kılar. Her geçersiz
+    kılma nesli artırır; geçersiz kılmadan önce başlamış bir veritabanı
+    okumasının sonucu önbelleğe yazılmaz.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._entries: "OrderedDict[Tuple[int, date], DayOccupancy]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[Tuple[int, date]]):
+        found: Dict[Tuple[int, date], DayOccupancy] = {}
+        missing: List[Tuple[int, date]] = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    missing.append(key)
+                else:
+                    self._entries.move_to_end(key)
+                    found[key] = entry
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put_many(self, entries: Dict[Tuple[int, date], DayOccupancy], generation: int) -> None:
+        with self._lock:
+            if generation != self.generation:
+                return
+            for key, value in entries.items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, doctor_id: int, day: date) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.pop((doctor_id, day), None)
+
+    def invalidate_many(self, keys: Iterable[Tuple[int, date]]) -> None:
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def invalidate_doctor(self, doctor_id: int) -> None:
+        with self._lock:
+            self.generation += 1
+            for key in [key for key in self._entries if key[0] == doctor_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+occupancy_cache = OccupancyCache(int(os.getenv("AVAILABILITY_CACHE_SIZE", "4096")))
+
+
+def free_mask(occupied: int, duration_minutes: int = SLOT_MINUTES) -> int:
+    """Verilen süredeki bir randevunun başlayabileceği slotların maskesi"""
+    span = max(1, -(-duration_minutes // SLOT_MINUTES))
+    if span > len(SLOT_GRID):
+        return 0
+    free = FULL_MASK & ~occupied
+    result = free
+    for offset in range(1, span):
+        result &= free >> offset
+    # The appointment has to end within working hours
+    return result & ((1 << (len(SLOT_GRID) - span + 1)) - 1)
+
+
+def working_days(start_date: date, end_date: date) -> List[date]:
+    """Hafta sonları hariç aralıktaki günler (iki uç dahil)"""
+    days = []
+    current = start_date
+    while current <= end_date:
+        if current.weekday() < 5:  # Monday = 0, Friday = 4
+            days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+# Same text as the WHERE of the partial unique_appointment index, so prepared
+# statements (asyncpg) can use the index even with a generic plan
+ACTIVE_APPOINTMENT = models.Appointment.status != literal_column("'cancelled'")
+
+
+def occupancy_query(doctor_ids: Iterable[int], start_date: date, end_date: date):
+    return select(
+        models.Appointment.doctor_id,
+        models.Appointment.appointment_date,
+        models.Appointment.appointment_time,
+        models.Service.duration_minutes,
+    ).outerjoin(
+        models.Service, models.Service.id == models.Appointment.service_id
+    ).where(
+        models.Appointment.doctor_id.in_(list(doctor_ids)),
+        models.Appointment.appointment_date >= start_date,
+        models.Appointment.appointment_date <= end_date,
+        ACTIVE_APPOINTMENT
+    )
+
+
+async def day_occupancy(
+    db: AsyncSession, doctor_ids: Iterable[int], start_date: date, end_date: date
+) -> Dict[Tuple[int, date], DayOccupancy]:
+    """(doctor_id, gün) -> DayOccupancy; tek sorgu"""
+    rows = (await db.execute(occupancy_query(doctor_ids, start_date, end_date))).all()
+
+    intervals: Dict[Tuple[int, date], List[Tuple[int, int]]] = {}
+    for doctor_id, appointment_date, appointment_time, duration in rows:
+        start = minute_of_day(appointment_time)
+        intervals.setdefault((doctor_id, appointment_date), []).append(
+            (start, start + (duration or SLOT_MINUTES))
+        )
+    return {key: DayOccupancy(value) for key, value in intervals.items()}
+
+
+async def cached_day_occupancy(
+    db: AsyncSession, doctor_ids: List[int], days: List[date]
+) -> Dict[Tuple[int, date], DayOccupancy]:
+    """Önbellekte olmayan doktor/günleri tek sorguda yükleyip önbelleğe yazar"""
+    found, missing = occupancy_cache.get_many(
+        (doctor_id, day) for doctor_id in doctor_ids for day in days
+    )
+    if missing:
+        generation = occupancy_cache.generation
+        missing_doctors = sorted({doctor_id for doctor_id, _ in missing})
+        first_day = min(day for _, day in missing)
+        last_day = max(day for _, day in missing)
+        loaded = await day_occupancy(db, missing_doctors, first_day, last_day)
+        fresh = {key: loaded.get(key, EMPTY_DAY) for key in missing}
+        occupancy_cache.put_many(fresh, generation)
+        found.update(fresh)
+    return found
+
+
+async def doctor_day(db: AsyncSession, doctor_id: int, day: date) -> DayOccupancy:
+    return (await day_occupancy(db, [doctor_id], day, day)).get((doctor_id, day), EMPTY_DAY)
+
+
+async def available_slots(
+    db: AsyncSession,
+    doctor_ids: List[int],
+    start_date: date,
+    end_date: date,
+    duration_minutes: int = SLOT_MINUTES,
+) -> List[dict]:
+    days = working_days(start_date, end_date)
+    if not days or not doctor_ids:
+        return []
+
+    occupancy = await cached_day_occupancy(db, doctor_ids, days)
+
+    result = []
+    for doctor_id in doctor_ids:
+        for day in days:
+            free = free_mask(occupancy.get((doctor_id, day), EMPTY_DAY).mask, duration_minutes)
+            day_label = day.isoformat()
+            for i, label in enumerate(SLOT_LABELS):
+                result.append({
+                    "doctor_id": doctor_id,
+                    "date": day_label,
+                    "time": label,
+                    "available": bool((free >> i) & 1),
+                })
+    return result
+
+
+async def available_bitmap(
+    db: AsyncSession,
+    doctor_ids: List[int],
+    start_date: date,
+    end_date: date,
+    duration_minutes: int = SLOT_MINUTES,
+) -> dict:
+    """available_slots ile aynı bilgi, doktor/gün başına tek tamsayı maske olarak.
+
+    free[d][k] maskesinin i. biti (en düşük bit = ilk slot), dates[k] gününde
+    slot_start + i * slot_minutes saatinin müsait olduğunu gösterir.
+    """
+    days = working_days(start_date, end_date)
+    occupancy = await cached_day_occupancy(db, doctor_ids, days) if days and doctor_ids else {}
+    return {
+        "format": "bitmap",
+        "slot_start": SLOT_LABELS[0],
+        "slot_minutes": SLOT_MINUTES,
+        "slot_count": len(SLOT_GRID),
+        "dates": [day.isoformat() for day in days],
+        "doctors": [
+            {
+                "doctor_id": doctor_id,
+                "free": [free_mask(occupancy.get((doctor_id, day), EMPTY_DAY).mask, duration_minutes) for day in days],
+            }
+            for doctor_id in doctor_ids
+        ],
+    }
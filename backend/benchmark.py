@@ -0,0 +1,285 @@
+"""Uç nokta benchmark'ı.
+
+Veritabanına (DATABASE_URL; SQLite veya PostgreSQL) isteğe bağlı olarak
+seed.py ile büyük bir veri seti eklenir, ardından mevcut uç noktalar
+sabit eşzamanlılıkla çağrılır ve her senaryo için p50/p95/p99 gecikme ile
+throughput ölçülür. Sonuç, çalıştırmalar karşılaştırılabilsin diye JSON
+olarak yazılır.
+
+    python benchmark.py --seed 1000000 --requests 500 --concurrency 16 --output bench.json
+    python benchmark.py --base-url http://localhost:8000 --output bench.json
+
+--base-url verilmezse uygulama aynı süreçte (httpx ASGITransport) çalıştırılır;
+bu durumda istemci maliyeti de ölçüme dahildir. Uzak sunucu ölçülürken
+DATABASE_URL, örnek doktor/hasta seçmek için sunucunun veritabanını göstermelidir.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import availability
+import models
+from database import engine
+
+SCENARIOS = ("available", "appointments_list", "appointments_by_email", "booking", "login")
+# Bookings go to weekdays after the seeded calendar so they do not conflict
+BOOKING_START_DATE = datetime(2035, 1, 1).date()  # a Monday
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank yüzdelik"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def load_sample(limit: int = 1000) -> Dict[str, list]:
+    """Senaryolarda kullanılacak doktor, hasta e-postası ve günler"""
+    db = Session(bind=engine)
+    try:
+        first_day, last_day = db.execute(
+            select(func.min(models.Appointment.appointment_date), func.max(models.Appointment.appointment_date))
+        ).one()
+        return {
+            "doctor_ids": db.scalars(select(models.Doctor.id).order_by(models.Doctor.id)).all(),
+            "service_ids": db.scalars(select(models.Service.id).order_by(models.Service.id)).all(),
+            "emails": db.scalars(
+                select(models.Patient.email)
+                .where(models.Patient.id.in_(
+                    select(models.Appointment.patient_id).order_by(models.Appointment.id.desc()).limit(limit)
+                ))
+            ).all(),
+            "days": availability.working_days(first_day, last_day) if first_day else [],
+        }
+    finally:
+        db.close()
+
+
+def dataset_size() -> Dict[str, int]:
+    db = Session(bind=engine)
+    try:
+        return {
+            table: db.scalar(select(func.count()).select_from(model))
+            for table, model in (
+                ("doctors", models.Doctor),
+                ("services", models.Service),
+                ("patients", models.Patient),
+                ("appointments", models.Appointment),
+            )
+        }
+    finally:
+        db.close()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def scenario_requests(client: httpx.AsyncClient, sample: Dict[str, list], rng: random.Random,
+                      admin: Dict[str, str], auth_headers: Dict[str, str]) -> Dict[str, Callable[[int], Awaitable[httpx.Response]]]:
+    """Senaryo adı -> i. isteği gönderen fonksiyon"""
+    doctor_ids = sample["doctor_ids"]
+    days = sample["days"] or [BOOKING_START_DATE]
+    slots = availability.SLOT_LABELS
+    # Every run books a different stretch of weeks
+    booking_offset = rng.randrange(1000) * 52
+
+    def available(i):
+        return client.get("/api/appointments/available", params={
+            "doctor_id": rng.choice(doctor_ids),
+            "start_date": rng.choice(days).isoformat(),
+        })
+
+    def appointments_list(i):
+        return client.get("/api/appointments", params={"limit": 50}, headers=auth_headers)
+
+    def appointments_by_email(i):
+        return client.get(f"/api/appointments/email/{rng.choice(sample['emails'])}")
+
+    def booking(i):
+        # A distinct doctor/working day/slot per request
+        doctor_id = doctor_ids[i % len(doctor_ids)]
+        slot = (i // len(doctor_ids)) % len(slots)
+        working_day = i // (len(doctor_ids) * len(slots))
+        week, weekday = divmod(working_day, 5)
+        day = BOOKING_START_DATE + timedelta(weeks=booking_offset + week, days=weekday)
+        return client.post("/api/appointments", json={
+            "first_name": "Benchmark",
+            "last_name": "Hasta",
+            "email": f"benchmark-{i % 1000}@example.com",
+            "phone": "05000000000",
+            "doctor_id": doctor_id,
+            "service_id": sample["service_ids"][0],
+            "appointment_date": day.isoformat(),
+            "appointment_time": slots[slot],
+        })
+
+    def login(i):
+        return client.post("/api/login", data=admin)
+
+    return {
+        "available": available,
+        "appointments_list": appointments_list,
+        "appointments_by_email": appointments_by_email,
+        "booking": booking,
+        "login": login,
+    }
+
+
+async def run_scenario(send: Callable[[int], Awaitable[httpx.Response]],
+                       requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < requests:
+            i = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                response = await send(i)
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as exc:
+                statuses[type(exc).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if not status.isdigit() or int(status) >= 500)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "status_counts": dict(sorted(statuses.items())),
+        "elapsed_seconds": round(elapsed, 4),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+
+async def run_benchmark(args) -> dict:
+    sample = load_sample()
+    if not sample["doctor_ids"] or not sample["emails"] or not sample["service_ids"]:
+        raise SystemExit("Veri seti boş; önce --seed ile örnek veri ekleyin.")
+
+    if args.base_url:
+        transport = None
+        base_url = args.base_url
+    else:
+        import main
+        import manage
+        manage.create_default_admin(args.admin_username, args.admin_password)
+        transport = httpx.ASGITransport(app=main.app)
+        base_url = "http://benchmark"
+
+    rng = random.Random(args.random_seed)
+    admin = {"username": args.admin_username, "password": args.admin_password}
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60) as client:
+        token = (await client.post("/api/login", data=admin)).json().get("access_token")
+        auth_headers = {"Authorization": f"Bearer {token}"} if token else {}
+        senders = scenario_requests(client, sample, rng, admin, auth_headers)
+        for name in args.scenarios:
+            send = senders[name]
+            for i in range(args.warmup):
+                await send(args.requests + i)
+            results[name] = await run_scenario(send, args.requests, args.concurrency)
+            print(
+                f"{name:24s} {results[name]['throughput_rps']:9.1f} req/s  "
+                f"p50 {results[name]['latency_ms']['p50']:8.2f} ms  "
+                f"p95 {results[name]['latency_ms']['p95']:8.2f} ms  "
+                f"p99 {results[name]['latency_ms']['p99']:8.2f} ms  "
+                f"{results[name]['status_counts']}",
+                file=sys.stderr,
+            )
+
+    if transport is not None:
+        from auth import shutdown_hash_executor
+        shutdown_hash_executor()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Randevu API benchmark'ı")
+    parser.add_argument("--base-url", help="Çalışan sunucu; verilmezse uygulama süreç içinde çalıştırılır")
+    parser.add_argument("--seed", type=int, metavar="N", help="Önce N randevuluk örnek veri ekle")
+    parser.add_argument("--doctors", type=int, default=20)
+    parser.add_argument("--patients", type=int, help="Varsayılan: randevu sayısının beşte biri")
+    parser.add_argument("--requests", type=int, default=200, help="Senaryo başına istek sayısı")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10, help="Ölçülmeyen ısınma istekleri")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--admin-username", default="admin")
+    parser.add_argument("--admin-password", default="admin123")
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON sonuç dosyası (varsayılan: stdout)")
+    args = parser.parse_args(argv)
+
+    seeded = None
+    if args.seed:
+        from manage import init_db
+        from seed import seed
+        init_db()
+        started = time.perf_counter()
+        seeded = seed(args.seed, args.doctors, args.patients, random_seed=args.random_seed)
+        seeded["seconds"] = round(time.perf_counter() - started, 2)
+        print(f"Seeded {seeded}", file=sys.stderr)
+
+    scenarios = asyncio.run(run_benchmark(args))
+    report = {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "target": args.base_url or "in-process",
+        "dataset": dataset_size(),
+        "seeded": seeded,
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "random_seed": args.random_seed,
+        },
+        "scenarios": scenarios,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
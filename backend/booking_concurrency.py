@@ -0,0 +1,174 @@
+"""Eşzamanlı rezervasyon testi: aynı saatlere çift randevu yazılamamalı.
+
+N istemci aynı doktorun birkaç saatine aynı anda POST /api/appointments
+gönderir. Saatler hizmet süresinden sık seçilir; böylece hem aynı başlangıç
+saati (unique_appointment) hem de çakışan aralıklar (doktor/gün kilidi)
+denenir. Ardından veritabanında aynı doktorun aktif randevularının
+çakışmadığı ve başarılı yanıt sayısının yazılan randevu sayısına eşit
+olduğu kontrol edilir; ihlal varsa çıkış kodu 1'dir.
+
+    python booking_concurrency.py --clients 50 --slots 6 --rounds 3
+    python booking_concurrency.py --base-url http://localhost:8000 --doctor-id 1 --service-id 4
+
+--base-url verilmezse geçici bir SQLite veritabanı oluşturulur ve uygulama
+aynı süreçte (httpx ASGITransport) çalıştırılır. Çalışan bir sunucu (ör.
+birden fazla worker ile PostgreSQL) test edilirken DATABASE_URL, kontrol
+için sunucunun veritabanını göstermelidir.
+"""
+from collections import Counter
+from datetime import date, timedelta
+from typing import List, Tuple
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+# Far after the seeded and benchmark calendars; each round uses its own day
+TEST_START_DATE = date(2036, 1, 7)  # a Monday
+
+
+def _prepare_local(duration_minutes: int) -> Tuple[int, int]:
+    """Geçici veritabanına bir doktor ve hizmet ekler"""
+    from sqlalchemy.orm import Session
+
+    import models
+    from database import engine
+    from manage import init_db
+
+    init_db()
+    with Session(bind=engine) as db:
+        doctor = models.Doctor(first_name="Eşzamanlı", last_name="Doktor", email="concurrency@example.com")
+        service = models.Service(name="Eşzamanlılık", duration_minutes=duration_minutes, price=100)
+        db.add_all([doctor, service])
+        db.commit()
+        return doctor.id, service.id
+
+
+def active_appointments(doctor_id: int, day: date) -> List[Tuple[int, int, int]]:
+    """(id, başlangıç dakikası, bitiş dakikası); iptal edilmemiş randevular"""
+    from sqlalchemy import func, select
+    from sqlalchemy.orm import Session
+
+    import availability
+    import models
+    from database import engine
+
+    appointment = models.Appointment
+    with Session(bind=engine) as db:
+        rows = db.execute(
+            select(appointment.id, appointment.appointment_time, models.Service.duration_minutes)
+            .outerjoin(models.Service, models.Service.id == appointment.service_id)
+            .where(
+                appointment.doctor_id == doctor_id,
+                appointment.appointment_date == day,
+                func.coalesce(appointment.status, "scheduled") != "cancelled",
+            )
+        ).all()
+    result = []
+    for appointment_id, start_time, duration in rows:
+        start = availability.minute_of_day(start_time)
+        result.append((appointment_id, start, start + (duration or availability.SLOT_MINUTES)))
+    return sorted(result, key=lambda row: row[1])
+
+
+def overlaps(appointments: List[Tuple[int, int, int]]) -> List[Tuple[int, int]]:
+    """Çakışan randevu id çiftleri (başlangıca göre sıralı listede)"""
+    found = []
+    for previous, current in zip(appointments, appointments[1:]):
+        if current[1] < previous[2]:
+            found.append((previous[0], current[0]))
+    return found
+
+
+async def run_round(client, doctor_id: int, service_id: int, day: date,
+                    clients: int, slots: List[str], round_number: int) -> Counter:
+    async def book(i: int):
+        return await client.post("/api/appointments", json={
+            "first_name": "Eşzamanlı",
+            "last_name": "Hasta",
+            "email": f"concurrency-{round_number}-{i}@example.com",
+            "phone": "05000000000",
+            "doctor_id": doctor_id,
+            "service_id": service_id,
+            "appointment_date": day.isoformat(),
+            "appointment_time": slots[i % len(slots)],
+        })
+
+    responses = await asyncio.gather(*(book(i) for i in range(clients)))
+    return Counter(response.status_code for response in responses)
+
+
+async def run(args) -> bool:
+    import httpx
+
+    if args.base_url:
+        transport, base_url = None, args.base_url
+        doctor_id, service_id = args.doctor_id, args.service_id
+    else:
+        import main
+        # Server errors are counted as 500 responses, as a real server would send them
+        transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+        base_url = "http://concurrency"
+        doctor_id, service_id = _prepare_local(args.duration)
+
+    # Starts every 15 minutes: same-start and overlapping bookings both race
+    slots = [f"{9 + (15 * i) // 60:02d}:{(15 * i) % 60:02d}" for i in range(args.slots)]
+    ok = True
+    limits = httpx.Limits(max_connections=args.clients)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60) as client:
+        for round_number in range(args.rounds):
+            day = TEST_START_DATE + timedelta(days=round_number + args.day_offset)
+            before = {row[0] for row in active_appointments(doctor_id, day)}
+            statuses = await run_round(client, doctor_id, service_id, day, args.clients, slots, round_number)
+            after = active_appointments(doctor_id, day)
+            created = len([row for row in after if row[0] not in before])
+            clashes = overlaps(after)
+            unexpected = {code: count for code, count in statuses.items() if code not in (201, 400)}
+
+            problems = []
+            if clashes:
+                problems.append(f"overlapping appointments {clashes}")
+            if statuses[201] != created:
+                problems.append(f"{statuses[201]} successful responses but {created} new appointments")
+            if unexpected:
+                problems.append(f"unexpected statuses {unexpected}")
+            ok = ok and not problems
+            print(
+                f"{'FAIL' if problems else 'OK':5s} {day.isoformat()}  "
+                f"{args.clients} requests  booked {statuses[201]}  rejected {statuses[400]}  "
+                f"{'; '.join(problems)}"
+            )
+
+    if transport is not None:
+        from auth import shutdown_hash_executor
+        shutdown_hash_executor()
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Eşzamanlı rezervasyon (çift randevu) testi")
+    parser.add_argument("--base-url", help="Çalışan sunucu; verilmezse geçici SQLite ile süreç içinde")
+    parser.add_argument("--doctor-id", type=int, help="--base-url ile zorunlu")
+    parser.add_argument("--service-id", type=int, help="--base-url ile zorunlu")
+    parser.add_argument("--duration", type=int, default=30, help="Geçici veritabanındaki hizmet süresi (dk)")
+    parser.add_argument("--clients", type=int, default=50, help="Tur başına eşzamanlı istek")
+    parser.add_argument("--slots", type=int, default=6, help="İsteklerin dağıtıldığı başlangıç saati sayısı")
+    parser.add_argument("--rounds", type=int, default=3, help="Her tur ayrı bir günde")
+    parser.add_argument("--day-offset", type=int, default=0, help="Tekrarlanan çalıştırmalar için gün kaydırma")
+    args = parser.parse_args(argv)
+
+    if args.base_url:
+        if args.doctor_id is None or args.service_id is None:
+            parser.error("--base-url ile --doctor-id ve --service-id gerekli")
+    else:
+        # Never write test bookings into a real database
+        workdir = tempfile.mkdtemp(prefix="booking-concurrency-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'concurrency.db')}"
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+
+    return 0 if asyncio.run(run(args)) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
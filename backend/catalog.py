@@ -0,0 +1,99 @@
+"""Nadiren değişen katalog listeleri (doktorlar, hizmetler) için önbellek.
+
+Her liste bir kez JSON olarak serileştirilip sürüm numarası ve güçlü bir
+ETag ile saklanır. Ekleme/güncelleme/silme uç noktaları ilgili listeyi
+geçersiz kılar; If-None-Match başlığı eşleşen istemcilere veritabanına
+gitmeden 304 döner.
+
+Geçersiz kılma yalnızca değişikliği yapan süreçte geçerlidir; birden fazla
+worker'da diğerleri listeyi en geç CATALOG_CACHE_TTL saniye sonra yeniden
+okur. ETag içerikten üretildiği için liste değişmediyse aynı kalır.
+"""
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict
+import hashlib
+import os
+import threading
+import time
+
+from fastapi import Request, Response
+
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "0"))
+# Seconds a cached list is served before it is reloaded; 0 keeps it until invalidated
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "5"))
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    version: int
+    body: bytes
+    etag: str
+    loaded_at: float
+
+
+class CatalogCache:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, entry: CatalogEntry) -> bool:
+        return not CATALOG_CACHE_TTL or time.monotonic() - entry.loaded_at < CATALOG_CACHE_TTL
+
+    async def get(self, name: str, load: Callable[[], Awaitable[bytes]]) -> CatalogEntry:
+        with self._lock:
+            entry = self._entries.get(name)
+            version = self._versions.get(name, 0)
+            if entry is not None and self._fresh(entry):
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        body = await load()
+        entry = CatalogEntry(
+            version=version,
+            body=body,
+            etag='"%s"' % hashlib.sha256(body).hexdigest()[:32],
+            loaded_at=time.monotonic(),
+        )
+        with self._lock:
+            # Do not store a body loaded before a concurrent invalidation
+            if self._versions.get(name, 0) == version:
+                self._entries[name] = entry
+        return entry
+
+    def invalidate(self, name: str) -> None:
+        with self._lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+            self._entries.pop(name, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "versions": dict(self._versions),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+catalog_cache = CatalogCache()
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def catalog_response(request: Request, entry: CatalogEntry) -> Response:
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": f"public, max-age={CATALOG_MAX_AGE}, must-revalidate",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
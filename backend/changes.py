@@ -0,0 +1,32 @@
+"""Değişiklik akışı sırası (/api/appointments/changes).
+
+Randevu ekleyen veya güncelleyen her transaction, appointment_change_counter
+tablosundaki tek satırı artırır ve yazdığı satırların change_seq sütununa bu
+değeri verir. Sayaç satırının kilidi (SQLite'ta yazma kilidi) commit'e kadar
+tutulduğu için değerler commit sırasıyla dağıtılır: change_seq = n olan bir
+satırı gören istemci, n'den küçük değer almış bütün transaction'ların
+commit edildiğini bilir; cursor'ın gerisinde sonradan satır belirmez.
+
+Bedeli, randevu yazmalarının sayaç artırımından commit'e kadar sıraya
+girmesidir. Bu yüzden sayaç, transaction'ın son yazmalarından hemen önce
+alınır.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from database import dialect_insert
+
+
+def next_change_seq_statement(db):
+    """Sayacı artıran (satır yoksa 1 ile oluşturan) ve yeni değeri dönen upsert"""
+    counter = models.AppointmentChangeCounter.__table__
+    upsert = dialect_insert(db, counter).values(id=1, value=1)
+    return upsert.on_conflict_do_update(
+        index_elements=[counter.c.id],
+        set_={"value": counter.c.value + 1},
+    ).returning(counter.c.value)
+
+
+async def next_change_seq(db: AsyncSession) -> int:
+    """Bu transaction'ın change_seq değeri; kilit commit/rollback'e kadar tutulur"""
+    return await db.scalar(next_change_seq_statement(db))
@@ -0,0 +1,190 @@
+"""Yanıt sıkıştırma (gzip; brotli kuruluysa br).
+
+Randevu listeleri ve haftalık müsaitlik yanıtları büyük ve tekrarlı JSON'dur;
+CompressionMiddleware bunları istemcinin Accept-Encoding başlığına göre
+sıkıştırır. Yalnızca izinli içerik türleri ve COMPRESSION_MINIMUM_SIZE
+baytından büyük gövdeler sıkıştırılır; küçük katalog yanıtları ve
+text/event-stream gibi akışlar olduğu gibi geçer. Sıkıştırılan her yanıtın
+orijinal ve gönderilen boyutu route bazında /metrics'e yazılır.
+
+    COMPRESSION_MINIMUM_SIZE=1024
+    COMPRESSION_GZIP_LEVEL=6
+    COMPRESSION_BROTLI_QUALITY=4
+    COMPRESSION_CONTENT_TYPES=application/json,text/csv,text/plain
+"""
+from typing import Optional, Tuple
+import os
+import zlib
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSIBLE_TYPES = tuple(
+    content_type.strip() for content_type in
+    os.getenv("COMPRESSION_CONTENT_TYPES", "application/json,text/csv,text/plain").split(",")
+    if content_type.strip()
+)
+
+
+def negotiate(accept_encoding: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    """Accept-Encoding -> "br", "gzip" veya None"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    if brotli_available and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._brotli = None
+            self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data)
+        return self._gzip.compress(data)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._gzip.flush()
+
+
+def _header(headers, name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CompressionMiddleware:
+    """İzinli içerik türlerindeki büyük yanıtları gzip/br ile sıkıştırır"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MINIMUM_SIZE,
+                 gzip_level: int = GZIP_LEVEL, brotli_quality: int = BROTLI_QUALITY,
+                 content_types: Tuple[str, ...] = COMPRESSIBLE_TYPES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.content_types = content_types
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate((_header(scope["headers"], b"accept-encoding") or b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+        original = sent = 0
+
+        def compressible(message) -> bool:
+            headers = message.get("headers", [])
+            if message["status"] < 200 or message["status"] in (204, 304):
+                return False
+            if _header(headers, b"content-encoding") is not None:
+                return False
+            content_type = (_header(headers, b"content-type") or b"").decode("latin-1").split(";")[0].strip()
+            if content_type not in self.content_types:
+                return False
+            length = _header(headers, b"content-length")
+            return length is None or int(length) >= self.minimum_size
+
+        def compressed_headers(headers, length: Optional[int]):
+            result = []
+            vary = b"Accept-Encoding"
+            for key, value in headers:
+                name = key.lower()
+                if name == b"content-length":
+                    continue
+                if name == b"vary":
+                    vary = value + b", " + vary
+                    continue
+                # Compressed bytes differ from the identity representation
+                if name == b"etag" and not value.startswith(b"W/"):
+                    value = b"W/" + value
+                result.append((key, value))
+            result.append((b"content-encoding", encoding.encode()))
+            result.append((b"vary", vary))
+            if length is not None:
+                result.append((b"content-length", str(length).encode()))
+            return result
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, passthrough, original, sent
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                if compressible(message):
+                    # Held back until the first body chunk decides the headers
+                    start = message
+                else:
+                    passthrough = True
+                    await send(message)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                if not more_body:
+                    data = compressor.compress(body) + compressor.finish()
+                    await send({**start, "headers": compressed_headers(start["headers"], len(data))})
+                    await send({"type": "http.response.body", "body": data})
+                    self._record(scope, encoding, len(body), len(data))
+                    return
+                # Streaming response: size unknown, send chunked
+                await send({**start, "headers": compressed_headers(start["headers"], None)})
+
+            original += len(body)
+            data = compressor.compress(body)
+            if not more_body:
+                data += compressor.finish()
+            sent += len(data)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+            if not more_body:
+                self._record(scope, encoding, original, sent)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _record(self, scope, encoding: str, original: int, compressed: int) -> None:
+        route = scope.get("route")
+        metrics.registry.record_compression(
+            scope["method"], getattr(route, "path", "<unmatched>"), encoding, original, compressed,
+        )
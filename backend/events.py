@@ -0,0 +1,96 @@
+"""Süreç içi yayın/abone (pub/sub) ve Server-Sent Events akışı.
+
+Randevu oluşturan veya durumunu değiştiren uç noktalar commit'ten sonra
+publish() çağırır; her abone (açık bir SSE bağlantısı) kendi sınırlı
+kuyruğundan okur. Yavaş bir istemcinin kuyruğu dolarsa bağlantısı
+kapatılır; EventSource yeniden bağlanır ve Last-Event-ID ile kaçırdığı
+olayları son EVENT_BUFFER_SIZE olaydan tamamlar.
+
+Olaylar yalnızca aynı süreçteki abonelere gider; birden fazla uvicorn
+worker'ı çalıştırılıyorsa her panel kendi worker'ındaki olayları görür.
+"""
+from collections import deque
+from typing import AsyncIterator, Deque, Optional, Set, Tuple
+import asyncio
+import json
+import os
+
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "1000"))
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENT_SUBSCRIBER_QUEUE_SIZE", "256"))
+HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+
+# Queued to a subscriber that fell behind; its stream ends and the client reconnects
+_OVERFLOW = object()
+
+Event = Tuple[int, str, str]  # (id, type, JSON data)
+
+
+class EventBroker:
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.last_id = 0
+        self.published = 0
+        self.dropped_subscribers = 0
+        self._recent: Deque[Event] = deque(maxlen=buffer_size)
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    def publish(self, event_type: str, data) -> None:
+        self.last_id += 1
+        self.published += 1
+        event = (self.last_id, event_type, json.dumps(data, default=str, ensure_ascii=False))
+        self._recent.append(event)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._subscribers.discard(queue)
+                self.dropped_subscribers += 1
+                queue.get_nowait()
+                queue.put_nowait(_OVERFLOW)
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        if last_event_id is not None:
+            missed = [event for event in self._recent if event[0] > last_event_id]
+            for event in missed[-self.queue_size:]:
+                queue.put_nowait(event)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "last_id": self.last_id,
+            "dropped_subscribers": self.dropped_subscribers,
+        }
+
+
+broker = EventBroker()
+
+
+def format_event(event: Event) -> str:
+    event_id, event_type, data = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+
+
+async def stream(queue: asyncio.Queue, is_disconnected) -> AsyncIterator[str]:
+    """Kuyruktaki olayları SSE formatında üretir; boşta kalınca heartbeat gönderir"""
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    break
+                yield ": ping\n\n"
+                continue
+            if event is _OVERFLOW:
+                break
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(queue)
@@ -0,0 +1,293 @@
+"""Toplu randevu içe aktarma.
+
+CSV (başlık satırlı) veya NDJSON satırları akış halinde okunur ve
+IMPORT_CHUNK_SIZE satırlık parçalar halinde işlenir. Her parça için:
+
+- doktor ve hizmetler bir kez yüklenir,
+- hastalar e-posta ile toplu olarak bulunur/eklenir (ON CONFLICT DO NOTHING),
+- ilgili doktor/günlerin dolu aralıkları tek sorguyla okunur,
+- geçerli satırlar tek bir executemany INSERT ile yazılır ve parça commit edilir.
+
+Sonuç satır satır döner: {"row": n, "status": "created", "id": ...} veya
+{"row": n, "status": "error", "detail": ...}. Satır numaraları veri
+satırlarına göre 1'den başlar. Her kayıt tek satırda olmalıdır.
+"""
+from collections import Counter
+from datetime import date, time
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import codecs
+import csv
+import json
+import os
+
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter, ValidationError, field_validator
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import availability
+import changes
+import models
+import stats
+from database import dialect_insert, lock_doctor_days
+from textnorm import build_search_text
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+IMPORT_STATUSES = ("scheduled", "approved", "rejected", "completed", "cancelled")
+NAME_PATTERN = r"^[A-Za-zÇĞİÖŞÜçğıöşü\s]+$"
+
+email_adapter = TypeAdapter(EmailStr)
+
+
+@lru_cache(maxsize=65536)
+def _normalize_email(value: str) -> str:
+    # email-validator dominates row validation; patients repeat across rows
+    return email_adapter.validate_python(value)
+
+
+class ImportRow(BaseModel):
+    first_name: str = Field(..., pattern=NAME_PATTERN)
+    last_name: str = Field(..., pattern=NAME_PATTERN)
+    email: str
+    phone: str
+    doctor_id: int
+    service_id: int
+    appointment_date: date
+    appointment_time: time
+    notes: Optional[str] = None
+    # Historical calendars may carry a final status
+    status: str = Field("scheduled", pattern="^(" + "|".join(IMPORT_STATUSES) + ")$")
+
+    @field_validator("email")
+    @classmethod
+    def validate_email(cls, value: str) -> str:
+        return _normalize_email(value)
+
+    @field_validator("appointment_time")
+    @classmethod
+    def validate_time(cls, value: time) -> time:
+        # TIME columns drop the offset and fractions; inserted rows are matched
+        # back by this value, so it has to survive the round trip unchanged
+        if value.tzinfo is not None:
+            raise ValueError("saat dilimi içermemeli (ör. 09:30)")
+        if value.microsecond:
+            raise ValueError("saniyeden küçük kısım içermemeli (ör. 09:30)")
+        return value
+
+
+def created(row: int, appointment_id: int) -> dict:
+    return {"row": row, "status": "created", "id": appointment_id}
+
+
+def failed(row: int, detail: str) -> dict:
+    return {"row": row, "status": "error", "detail": detail}
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Bayt parçalarını satırlara böler (UTF-8, BOM'lu olabilir)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """(satır no, kayıt, hata) üçlüleri"""
+    header: Optional[List[str]] = None
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        if fmt == "csv" and header is None:
+            header = [name.strip() for name in next(csv.reader([line]))]
+            continue
+        row += 1
+        try:
+            if fmt == "csv":
+                values = next(csv.reader([line]))
+                # Empty CSV cells mean "not given" so model defaults apply
+                record = {key: value for key, value in zip(header, values) if value != ""}
+            else:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("satır bir JSON nesnesi olmalı")
+        except (csv.Error, ValueError) as exc:
+            yield row, None, f"Satır okunamadı: {exc}"
+            continue
+        yield row, record, None
+
+
+def _validation_detail(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+    )
+
+
+async def _resolve_patients(db: AsyncSession, rows: Iterable[ImportRow]) -> Dict[str, int]:
+    """E-posta -> hasta id; eksik hastalar tek INSERT ile eklenir"""
+    first_seen: Dict[str, ImportRow] = {}
+    for item in rows:
+        first_seen.setdefault(item.email, item)
+    emails = list(first_seen)
+
+    found = dict((await db.execute(
+        select(models.Patient.email, models.Patient.id).where(models.Patient.email.in_(emails))
+    )).all())
+    missing = [first_seen[email] for email in emails if email not in found]
+    if missing:
+        await db.execute(
+            dialect_insert(db, models.Patient).values([
+                {
+                    "first_name": item.first_name,
+                    "last_name": item.last_name,
+                    "email": item.email,
+                    "phone": item.phone,
+                    # The column default cannot read multi-row VALUES parameters
+                    "search_text": build_search_text(item.first_name, item.last_name, item.email, item.phone),
+                }
+                for item in missing
+            ]).on_conflict_do_nothing(index_elements=[models.Patient.email])
+        )
+        found.update((await db.execute(
+            select(models.Patient.email, models.Patient.id).where(
+                models.Patient.email.in_([item.email for item in missing])
+            )
+        )).all())
+    return found
+
+
+async def _import_chunk(db: AsyncSession, chunk: List[Tuple[int, ImportRow]],
+                        durations: Dict[int, int], doctor_ids: set) -> List[dict]:
+    """Bir parçayı yazar (commit etmez) ve satır sonuçlarını döner"""
+    results: List[dict] = []
+    accepted: List[Tuple[int, ImportRow]] = []
+    for row, item in chunk:
+        if item.doctor_id not in doctor_ids:
+            results.append(failed(row, "Doktor bulunamadı"))
+        elif item.service_id not in durations:
+            results.append(failed(row, "Hizmet bulunamadı"))
+        else:
+            accepted.append((row, item))
+    if not accepted:
+        return results
+
+    keys = sorted({(item.doctor_id, item.appointment_date) for _, item in accepted})
+    await lock_doctor_days(db, keys)
+
+    patient_ids = await _resolve_patients(db, (item for _, item in accepted))
+
+    occupancy = await availability.day_occupancy(
+        db,
+        sorted({doctor_id for doctor_id, _ in keys}),
+        min(day for _, day in keys),
+        max(day for _, day in keys),
+    )
+    intervals: Dict[Tuple[int, date], List[Tuple[int, int]]] = {}
+    for key, day in occupancy.items():
+        intervals[key] = list(zip(day.starts, day.ends))
+
+    pending: Dict[tuple, List[int]] = {}
+    values: List[dict] = []
+    for row, item in accepted:
+        if item.status != "cancelled":
+            key = (item.doctor_id, item.appointment_date)
+            start = availability.minute_of_day(item.appointment_time)
+            end = start + (durations[item.service_id] or availability.SLOT_MINUTES)
+            if any(other_start < end and start < other_end for other_start, other_end in intervals.get(key, ())):
+                results.append(failed(row, "Bu randevu saati dolu"))
+                continue
+            intervals.setdefault(key, []).append((start, end))
+        patient_id = patient_ids[item.email]
+        pending.setdefault(
+            (patient_id, item.doctor_id, item.appointment_date, item.appointment_time), []
+        ).append(row)
+        values.append({
+            "patient_id": patient_id,
+            "doctor_id": item.doctor_id,
+            "service_id": item.service_id,
+            "appointment_date": item.appointment_date,
+            "appointment_time": item.appointment_time,
+            "status": item.status,
+            "notes": item.notes,
+        })
+
+    if values:
+        # Taken just before the writes: the counter stays locked until commit
+        change_seq = await changes.next_change_seq(db)
+        for value in values:
+            value["change_seq"] = change_seq
+        # Core executemany; RETURNING order is not guaranteed (and asking SQLAlchemy
+        # to sort it falls back to one INSERT per row), so ids are matched back
+        # through the natural key
+        table = models.Appointment.__table__
+        inserted = (await db.execute(
+            insert(table).returning(
+                table.c.id, table.c.patient_id, table.c.doctor_id,
+                table.c.appointment_date, table.c.appointment_time,
+            ),
+            values,
+        )).all()
+        for appointment_id, *key in inserted:
+            results.append(created(pending[tuple(key)].pop(0), appointment_id))
+        await stats.apply_deltas(db, Counter(
+            (row["appointment_date"], row["doctor_id"], row["service_id"], row["status"]) for row in values
+        ))
+    return results
+
+
+async def import_appointments(db: AsyncSession, lines: AsyncIterator[str], fmt: str) -> dict:
+    """Satırları parça parça içe aktarır; her parça ayrı bir transaction'dır"""
+    if fmt not in ("csv", "ndjson"):
+        raise ValueError(f"Desteklenmeyen format: {fmt}")
+
+    results: List[dict] = []
+    durations = dict((await db.execute(
+        select(models.Service.id, models.Service.duration_minutes)
+    )).all())
+    doctor_ids = set((await db.scalars(select(models.Doctor.id))).all())
+    await db.commit()
+
+    async def flush(chunk: List[Tuple[int, ImportRow]]) -> None:
+        try:
+            results.extend(await _import_chunk(db, chunk, durations, doctor_ids))
+            await db.commit()
+        except IntegrityError:
+            # A concurrent booking took one of the slots; retry the chunk row by row
+            await db.rollback()
+            for entry in chunk:
+                try:
+                    outcome = await _import_chunk(db, [entry], durations, doctor_ids)
+                    await db.commit()
+                except IntegrityError:
+                    await db.rollback()
+                    outcome = [failed(entry[0], "Bu randevu saati dolu")]
+                results.extend(outcome)
+        for doctor_id, day in {(item.doctor_id, item.appointment_date) for _, item in chunk}:
+            availability.occupancy_cache.invalidate(doctor_id, day)
+
+    chunk: List[Tuple[int, ImportRow]] = []
+    async for row, record, error in iter_records(lines, fmt):
+        if error:
+            results.append(failed(row, error))
+            continue
+        try:
+            chunk.append((row, ImportRow.model_validate(record)))
+        except ValidationError as exc:
+            results.append(failed(row, _validation_detail(exc)))
+            continue
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            await flush(chunk)
+            chunk = []
+    if chunk:
+        await flush(chunk)
+
+    results.sort(key=lambda result: result["row"])
+    created_count = sum(1 for result in results if result["status"] == "created")
+    return {"created": created_count, "failed": len(results) - created_count, "results": results}
@@ -1,46 +1,66 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+import time as time_module
+
+# Startup time is measured from the first import of this module
+IMPORT_STARTED = time_module.perf_counter()
+
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from datetime import datetime, date, time, timedelta
-from typing import List, Optional
-from pydantic import BaseModel, EmailStr, Field
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from sqlalchemy import func, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from datetime import datetime, date, time, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter
+import os
 import re
+import base64
+import binascii
 import models
-from database import engine, get_db
+import availability
+import catalog
+import metrics
+import manage
+import importer
+import stats
+import events
+import serialization
+import compression
+import patient_search
+import archive
+import changes
+from database import engine, async_engine, get_async_db, pool_status, dialect_insert, lock_doctor_day
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from auth import verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_password_hash
+from auth import (
+    verify_password_async, create_access_token, decode_access_token, shutdown_hash_executor,
+    token_cache, HashingOverloaded, ACCESS_TOKEN_EXPIRE_MINUTES,
+)
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
-
-def create_default_admin():
-    db = Session(bind=engine)
-    try:
-        user = db.query(models.Admin).filter(models.Admin.username == "admin").first()
-        if not user:
-            print("Creating default admin user...")
-            admin = models.Admin(
-                username="admin",
-                password_hash=get_password_hash("admin123")
-            )
-            db.add(admin)
-            db.commit()
-            print("Default admin user created.")
-        else:
-            # Admin varsa şifresini güncelle (her ihtimale karşı)
-            print("Admin user exists. Updating password to default...")
-            user.password_hash = get_password_hash("admin123")
-            db.commit()
-            print("Admin password reset to default (admin123).")
-    except Exception as e:
-        print(f"Error creating/updating admin user: {e}")
-    finally:
-        db.close()
-
-create_default_admin()
+BOOTSTRAP_ON_STARTUP = os.getenv("BOOTSTRAP_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+# Bulk status changes leave appointments in these states untouched
+FINAL_STATUSES = ("cancelled", "rejected", "completed")
+# Rounds of re-reading rows whose status changed between read and UPDATE
+STATUS_UPDATE_ATTEMPTS = int(os.getenv("STATUS_UPDATE_ATTEMPTS", "3"))
+startup_timings = {}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema and admin bootstrap normally run once via `python manage.py bootstrap`
+    if BOOTSTRAP_ON_STARTUP:
+        bootstrap_started = time_module.perf_counter()
+        await run_in_threadpool(manage.bootstrap)
+        startup_timings["bootstrap_seconds"] = time_module.perf_counter() - bootstrap_started
+    startup_timings["startup_seconds"] = time_module.perf_counter() - IMPORT_STARTED
+    print("Startup completed in %.1f ms" % (startup_timings["startup_seconds"] * 1000))
+    yield
+    shutdown_hash_executor()
+    await async_engine.dispose()
 
 # Initialize FastAPI
-app = FastAPI(title="Diş Kliniği Randevu Sistemi API")
+app = FastAPI(title="Diş Kliniği Randevu Sistemi API", lifespan=lifespan)
 
 # CORS configuration
 app.add_middleware(
@@ -51,6 +71,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/br for large JSON and CSV bodies; inside MetricsMiddleware so latency includes it
+app.add_middleware(compression.CompressionMiddleware)
+
+# Per-route latency, status codes and SQL counters for /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+
 
 
 # Pydantic Schemas api veri giriş cikisleri
@@ -77,10 +105,38 @@ class AppointmentResponse(BaseModel):# Randevu yanıt modeli kullanıcının gor
     doctor_name: Optional[str] = None
     patient_name: Optional[str] = None
     service_name: Optional[str] = None
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class AppointmentPage(BaseModel):
+    items: List[AppointmentResponse]
+    next_cursor: Optional[str] = None
+
+class BulkStatusUpdate(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=1000)
+    status: str = Field(..., pattern="^(approved|rejected|cancelled)$")
+
+class AppointmentChanges(BaseModel):
+    items: List[AppointmentResponse]
+    next_cursor: str
+    has_more: bool
+
+class PatientResponse(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    phone: str
+    
+    class Config:
+        from_attributes = True
+
+class PatientSearchPage(BaseModel):
+    items: List[PatientResponse]
+    next_cursor: Optional[str] = None
+
 class DoctorResponse(BaseModel):
     id: int
     first_name: str
@@ -102,6 +158,9 @@ class ServiceResponse(BaseModel):
     class Config:
         from_attributes = True
 
+doctor_list_adapter = TypeAdapter(List[DoctorResponse])
+service_list_adapter = TypeAdapter(List[ServiceResponse])
+
 class AvailableSlot(BaseModel):
     date: date
     time: time
@@ -140,10 +199,28 @@ class ServiceUpdate(BaseModel):
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/login")
 
+def get_current_admin(token: str = Depends(oauth2_scheme)) -> str:
+    username = decode_access_token(token)
+    if username is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return username
+
 @app.post("/api/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.Admin).filter(models.Admin.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(models.Admin).where(models.Admin.username == form_data.username))
+    try:
+        password_ok = bool(user) and await verify_password_async(form_data.password, user.password_hash)
+    except HashingOverloaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts, please retry",
+            headers={"Retry-After": "1"},
+        )
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -164,33 +241,81 @@ def logout():
 def read_root():
     return {"message": "Diş Kliniği Randevu Sistemi API", "version": "1.0"}
 
+@app.get("/api/cache/stats", dependencies=[Depends(get_current_admin)])
+def get_cache_stats():
+    """Uygulama içi önbelleklerin isabet/ıskalama sayaçları"""
+    return {
+        "availability": availability.occupancy_cache.stats(),
+        "catalog": catalog.catalog_cache.stats(),
+        "tokens": token_cache.stats(),
+    }
+
+@app.get("/api/events/stats", dependencies=[Depends(get_current_admin)])
+def get_event_stats():
+    """Olay akışı abone ve yayın sayaçları"""
+    return events.broker.stats()
+
+@app.get("/api/pool/stats", dependencies=[Depends(get_current_admin)])
+def get_pool_stats():
+    """Veritabanı bağlantı havuzu istatistikleri"""
+    return pool_status()
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """Prometheus metin formatında metrikler"""
+    gauges = []
+    for engine_name, snapshot in pool_status().items():
+        for key, value in snapshot.items():
+            gauges.append((f"db_pool_{key}", "Connection pool statistics", {"engine": engine_name}, value))
+    caches = {
+        "availability": availability.occupancy_cache.stats(),
+        "catalog": catalog.catalog_cache.stats(),
+        "tokens": token_cache.stats(),
+    }
+    for cache_name, stats in caches.items():
+        for key in ("hits", "misses", "size"):
+            if key in stats:
+                gauges.append((f"cache_{key}", "In-process cache counters", {"cache": cache_name}, stats[key]))
+    for key, value in events.broker.stats().items():
+        gauges.append((f"events_{key}", "Server-sent event broker counters", {}, value))
+    for key, value in startup_timings.items():
+        gauges.append((f"app_{key}", "Application startup timings", {}, round(value, 6)))
+    return metrics.registry.render(gauges)
+
 # Doctor endpoints
 @app.get("/api/doctors", response_model=List[DoctorResponse])
-def get_doctors(db: Session = Depends(get_db)):
-    doctors = db.query(models.Doctor).all()
-    return doctors
+async def get_doctors(request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        doctors = (await db.scalars(select(models.Doctor))).all()
+        return doctor_list_adapter.dump_json(
+            doctor_list_adapter.validate_python(doctors, from_attributes=True)
+        )
+
+    entry = await catalog.catalog_cache.get("doctors", load)
+    return catalog.catalog_response(request, entry)
 
 @app.get("/api/doctors/{doctor_id}", response_model=DoctorResponse)
-def get_doctor(doctor_id: int, db: Session = Depends(get_db)):
-    doctor = db.query(models.Doctor).filter(models.Doctor.id == doctor_id).first()
+async def get_doctor(doctor_id: int, db: AsyncSession = Depends(get_async_db)):
+    doctor = await db.get(models.Doctor, doctor_id)
     if not doctor:
         raise HTTPException(status_code=404, detail="Doktor bulunamadı")
     return doctor
 
 @app.post("/api/doctors", response_model=DoctorResponse, status_code=status.HTTP_201_CREATED)
-def create_doctor(doctor: DoctorCreate, db: Session = Depends(get_db)):
-    db_doctor = db.query(models.Doctor).filter(models.Doctor.email == doctor.email).first()
+async def create_doctor(doctor: DoctorCreate, db: AsyncSession = Depends(get_async_db)):
+    db_doctor = await db.scalar(select(models.Doctor).where(models.Doctor.email == doctor.email))
     if db_doctor:
         raise HTTPException(status_code=400, detail="Email already registered")
     new_doctor = models.Doctor(**doctor.dict())
     db.add(new_doctor)
-    db.commit()
-    db.refresh(new_doctor)
+    await db.commit()
+    await db.refresh(new_doctor)
+    catalog.catalog_cache.invalidate("doctors")
     return new_doctor
 
 @app.put("/api/doctors/{doctor_id}", response_model=DoctorResponse)
-def update_doctor(doctor_id: int, doctor: DoctorUpdate, db: Session = Depends(get_db)):
-    db_doctor = db.query(models.Doctor).filter(models.Doctor.id == doctor_id).first()
+async def update_doctor(doctor_id: int, doctor: DoctorUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_doctor = await db.get(models.Doctor, doctor_id)
     if not db_doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     
@@ -198,275 +323,601 @@ def update_doctor(doctor_id: int, doctor: DoctorUpdate, db: Session = Depends(ge
     for key, value in update_data.items():
         setattr(db_doctor, key, value)
     
-    db.commit()
-    db.refresh(db_doctor)
+    await db.commit()
+    await db.refresh(db_doctor)
+    catalog.catalog_cache.invalidate("doctors")
     return db_doctor
 
 @app.delete("/api/doctors/{doctor_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_doctor(doctor_id: int, db: Session = Depends(get_db)):
-    db_doctor = db.query(models.Doctor).filter(models.Doctor.id == doctor_id).first()
+async def delete_doctor(doctor_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_doctor = await db.get(models.Doctor, doctor_id)
     if not db_doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     
-    db.delete(db_doctor)
-    db.commit()
+    await db.delete(db_doctor)
+    await db.commit()
+    availability.occupancy_cache.invalidate_doctor(doctor_id)
+    catalog.catalog_cache.invalidate("doctors")
     return None
 
 # Service endpoints
 @app.get("/api/services", response_model=List[ServiceResponse])
-def get_services(db: Session = Depends(get_db)):
-    services = db.query(models.Service).all()
-    return services
+async def get_services(request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        services = (await db.scalars(select(models.Service))).all()
+        return service_list_adapter.dump_json(
+            service_list_adapter.validate_python(services, from_attributes=True)
+        )
+
+    entry = await catalog.catalog_cache.get("services", load)
+    return catalog.catalog_response(request, entry)
 
 @app.post("/api/services", response_model=ServiceResponse, status_code=status.HTTP_201_CREATED)
-def create_service(service: ServiceCreate, db: Session = Depends(get_db)):
+async def create_service(service: ServiceCreate, db: AsyncSession = Depends(get_async_db)):
     new_service = models.Service(**service.dict())
     db.add(new_service)
-    db.commit()
-    db.refresh(new_service)
+    await db.commit()
+    await db.refresh(new_service)
+    catalog.catalog_cache.invalidate("services")
     return new_service
 
 @app.put("/api/services/{service_id}", response_model=ServiceResponse)
-def update_service(service_id: int, service: ServiceUpdate, db: Session = Depends(get_db)):
-    db_service = db.query(models.Service).filter(models.Service.id == service_id).first()
+async def update_service(service_id: int, service: ServiceUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_service = await db.get(models.Service, service_id)
     if not db_service:
         raise HTTPException(status_code=404, detail="Service not found")
     
     update_data = service.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_service, key, value)
-    
-    db.commit()
-    db.refresh(db_service)
+    if "price" in update_data:
+        # Rollup revenue is count x current price; keep it consistent with the new price
+        await db.flush()
+        await stats.reprice_service(db, service_id)
+    
+    await db.commit()
+    await db.refresh(db_service)
+    catalog.catalog_cache.invalidate("services")
+    if "duration_minutes" in update_data:
+        availability.occupancy_cache.clear()
     return db_service
 
 @app.delete("/api/services/{service_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_service(service_id: int, db: Session = Depends(get_db)):
-    db_service = db.query(models.Service).filter(models.Service.id == service_id).first()
+async def delete_service(service_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_service = await db.get(models.Service, service_id)
     if not db_service:
         raise HTTPException(status_code=404, detail="Service not found")
     
-    db.delete(db_service)
-    db.commit()
+    await db.delete(db_service)
+    await db.commit()
+    availability.occupancy_cache.clear()
+    catalog.catalog_cache.invalidate("services")
     return None
 
 # Appointment endpoints
+async def transition_status(db: AsyncSession, ids: List[int], new_status: str,
+                            skip: Tuple[str, ...] = ()) -> Tuple[list, Dict[int, str]]:
+    """Randevuları new_status'a geçirir ve özet tabloyu günceller; commit etmez.
+
+    UPDATE yalnızca satır hâlâ okunan durumdaysa eşleşir (compare-and-set);
+    böylece özet farkı, gerçekten değişen satırın eski durumundan yazılır.
+    Arada değişen satırlar yeniden okunur. Dönüş: (değişen satırlar,
+    id -> son okunan durum); bulunamayan id'ler sözlükte yer almaz.
+    """
+    appointment = models.Appointment
+    status_column = func.coalesce(appointment.status, "scheduled")
+    current: Dict[int, str] = {}
+    changed, deltas = [], []
+    change_seq = None
+    pending = list(ids)
+    for _ in range(STATUS_UPDATE_ATTEMPTS):
+        read = dict((await db.execute(
+            select(appointment.id, status_column).where(appointment.id.in_(pending)).with_for_update()
+        )).all())
+        current.update(read)
+        groups: Dict[str, List[int]] = {}
+        for appointment_id, old_status in read.items():
+            if old_status != new_status and old_status not in skip:
+                groups.setdefault(old_status, []).append(appointment_id)
+        pending = []
+        for old_status, group in groups.items():
+            if change_seq is None:
+                change_seq = await changes.next_change_seq(db)
+            rows = (await db.execute(
+                update(appointment)
+                .where(appointment.id.in_(group), status_column == old_status)
+                .values(status=new_status, change_seq=change_seq)
+                .returning(
+                    appointment.id, appointment.status, appointment.doctor_id,
+                    appointment.service_id, appointment.appointment_date,
+                )
+                .execution_options(synchronize_session=False)
+            )).all()
+            moved = {row.id for row in rows}
+            pending.extend(appointment_id for appointment_id in group if appointment_id not in moved)
+            changed.extend(rows)
+            deltas.extend((row.appointment_date, row.doctor_id, row.service_id, old_status) for row in rows)
+            for row in rows:
+                current[row.id] = new_status
+        if not pending:
+            break
+    else:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Randevu durumu aynı anda değiştirildi, tekrar deneyin")
+    await stats.record_status_changes(db, deltas, new_status)
+    return changed, current
+
+def publish_status_change(appointment: models.Appointment) -> None:
+    events.broker.publish("appointment.status", {
+        "id": appointment.id,
+        "status": appointment.status,
+        "doctor_id": appointment.doctor_id,
+        "appointment_date": appointment.appointment_date.isoformat(),
+    })
+
+def appointment_query():
+    """Doktor, hasta ve hizmeti tek sorguda (JOIN) yükleyen randevu sorgusu"""
+    return select(models.Appointment).options(
+        joinedload(models.Appointment.doctor),
+        joinedload(models.Appointment.patient),
+        joinedload(models.Appointment.service),
+    )
+
+def appointment_response(apt: models.Appointment) -> AppointmentResponse:
+    apt_response = AppointmentResponse.from_orm(apt)
+    apt_response.doctor_name = f"{apt.doctor.first_name} {apt.doctor.last_name}" if apt.doctor else None
+    apt_response.patient_name = f"{apt.patient.first_name} {apt.patient.last_name}" if apt.patient else None
+    apt_response.service_name = apt.service.name if apt.service else None
+    return apt_response
+
+# Listing endpoints: with FAST_JSON_RESPONSES rows are read as column tuples and
+# written with orjson, skipping from_orm and response_model validation
+def appointment_list_query():
+    return serialization.appointment_rows_query() if serialization.FAST_JSON_RESPONSES else appointment_query()
+
+async def fetch_appointment_list(db: AsyncSession, query) -> list:
+    if serialization.FAST_JSON_RESPONSES:
+        return (await db.execute(query)).all()
+    return (await db.scalars(query)).all()
+
+def appointment_list_items(appointments) -> list:
+    if serialization.FAST_JSON_RESPONSES:
+        return [serialization.appointment_row(row) for row in appointments]
+    return [appointment_response(apt) for apt in appointments]
+
+def appointment_list_response(content, model=None):
+    if serialization.FAST_JSON_RESPONSES:
+        return serialization.FastJSONResponse(content)
+    return model(**content) if model else content
+
 @app.get("/api/appointments/available")
-def get_available_slots(
-    doctor_id: int,
-    start_date: date,
+async def get_available_slots(
+    doctor_id: List[int] = Query(...),
+    start_date: date = Query(...),
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db)
+    service_id: Optional[int] = None,
+    slot_format: str = Query("slots", alias="format", pattern="^(slots|bitmap)$"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Belirtilen tarih aralığında müsait randevu saatlerini döndürür"""
+    """Belirtilen tarih aralığında müsait randevu saatlerini döndürür.
+
+    format=bitmap: slot başına nesne yerine doktor/gün başına boş slot maskesi.
+    """
     if not end_date:
         end_date = start_date + timedelta(days=7)
     
-    # Working hours: 09:00 - 18:00, 30 minute slots
-    working_hours_start = time(9, 0)
-    working_hours_end = time(18, 0)
-    slot_duration = 30  # minutes
-    
-    available_slots = []
-    current_date = start_date
+    # A slot is free only if the whole service fits in it
+    duration = availability.SLOT_MINUTES
+    if service_id is not None:
+        service = await db.get(models.Service, service_id)
+        if not service:
+            raise HTTPException(status_code=404, detail="Hizmet bulunamadı")
+        duration = service.duration_minutes or availability.SLOT_MINUTES
     
-    while current_date <= end_date:
-        # Skip weekends
-        if current_date.weekday() < 5:  # Monday = 0, Friday = 4
-            # Get existing appointments for this date
-            existing_appointments = db.query(models.Appointment).filter(
-                models.Appointment.doctor_id == doctor_id,
-                models.Appointment.appointment_date == current_date,
-                models.Appointment.status != "cancelled"
-            ).all()
-            
-            booked_times = {apt.appointment_time for apt in existing_appointments}
-            
-            # Generate time slots
-            current_time = datetime.combine(current_date, working_hours_start)
-            end_time = datetime.combine(current_date, working_hours_end)
-            
-            while current_time < end_time:
-                slot_time = current_time.time()
-                is_available = slot_time not in booked_times
-                
-                available_slots.append({
-                    "date": current_date.isoformat(),
-                    "time": slot_time.strftime("%H:%M"),
-                    "available": is_available
-                })
-                
-                current_time += timedelta(minutes=slot_duration)
-        
-        current_date += timedelta(days=1)
-    
-    return available_slots
+    # Unique doctor ids, request order preserved
+    doctor_ids = list(dict.fromkeys(doctor_id))
+    if slot_format == "bitmap":
+        return await availability.available_bitmap(db, doctor_ids, start_date, end_date, duration)
+    return await availability.available_slots(db, doctor_ids, start_date, end_date, duration)
 
 @app.post("/api/appointments", response_model=AppointmentResponse, status_code=status.HTTP_201_CREATED)
-def create_appointment(appointment: AppointmentCreate, db: Session = Depends(get_db)):
-    # Check if patient exists by email, if not create new patient
-    patient = db.query(models.Patient).filter(models.Patient.email == appointment.email).first()
+async def create_appointment(appointment: AppointmentCreate, db: AsyncSession = Depends(get_async_db)):
+    # Doctor and service in one query; a missing service shows up as NULL columns
+    row = (await db.execute(
+        select(
+            models.Doctor.first_name,
+            models.Doctor.last_name,
+            models.Service.id.label("service_id"),
+            models.Service.name.label("service_name"),
+            models.Service.duration_minutes,
+        ).select_from(models.Doctor).outerjoin(
+            models.Service, models.Service.id == appointment.service_id
+        ).where(models.Doctor.id == appointment.doctor_id)
+    )).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Doktor bulunamadı")
+    if row.service_id is None:
+        raise HTTPException(status_code=404, detail="Hizmet bulunamadı")
     
-    if not patient:
-        # Create new patient
-        patient = models.Patient(
+    start = availability.minute_of_day(appointment.appointment_time)
+    end = start + (row.duration_minutes or availability.SLOT_MINUTES)
+    
+    # Patient upsert, overlap check and insert share one transaction
+    try:
+        await lock_doctor_day(db, appointment.doctor_id, appointment.appointment_date)
+        
+        upsert = dialect_insert(db, models.Patient).values(
             first_name=appointment.first_name,
             last_name=appointment.last_name,
             email=appointment.email,
             phone=appointment.phone
         )
-        db.add(patient)
-        db.commit()
-        db.refresh(patient)
-    
-    # Check if doctor exists
-    doctor = db.query(models.Doctor).filter(models.Doctor.id == appointment.doctor_id).first()
-    if not doctor:
-        raise HTTPException(status_code=404, detail="Doktor bulunamadı")
-    
-    # Check if service exists
-    service = db.query(models.Service).filter(models.Service.id == appointment.service_id).first()
-    if not service:
-        raise HTTPException(status_code=404, detail="Hizmet bulunamadı")
-    
-    # Check if slot is available
-    existing = db.query(models.Appointment).filter(
-        models.Appointment.doctor_id == appointment.doctor_id,
-        models.Appointment.appointment_date == appointment.appointment_date,
-        models.Appointment.appointment_time == appointment.appointment_time,
-        models.Appointment.status != "cancelled"
-    ).first()
-    
-    if existing:
+        patient = (await db.execute(
+            upsert.on_conflict_do_update(
+                index_elements=[models.Patient.email],
+                set_={"email": upsert.excluded.email}
+            ).returning(models.Patient.id, models.Patient.first_name, models.Patient.last_name)
+        )).one()
+        
+        # Check if the whole service interval is free
+        occupancy = await availability.doctor_day(db, appointment.doctor_id, appointment.appointment_date)
+        if occupancy.overlaps(start, end):
+            raise HTTPException(status_code=400, detail="Bu randevu saati dolu")
+        
+        # Taken just before the writes: the counter stays locked until commit
+        change_seq = await changes.next_change_seq(db)
+        # unique_appointment still rejects a concurrent booking of the same start time
+        new_appointment = await db.scalar(
+            insert(models.Appointment).values(
+                patient_id=patient.id,
+                doctor_id=appointment.doctor_id,
+                service_id=appointment.service_id,
+                appointment_date=appointment.appointment_date,
+                appointment_time=appointment.appointment_time,
+                notes=appointment.notes,
+                change_seq=change_seq
+            ).returning(models.Appointment)
+        )
+        await stats.record_created(
+            db, appointment.appointment_date, appointment.doctor_id, appointment.service_id, new_appointment.status
+        )
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Bu randevu saati dolu")
-    
-    # Create appointment
-    new_appointment = models.Appointment(
-        patient_id=patient.id,
-        doctor_id=appointment.doctor_id,
-        service_id=appointment.service_id,
-        appointment_date=appointment.appointment_date,
-        appointment_time=appointment.appointment_time,
-        notes=appointment.notes
-    )
-    db.add(new_appointment)
-    db.commit()
-    db.refresh(new_appointment)
+    availability.occupancy_cache.invalidate(new_appointment.doctor_id, new_appointment.appointment_date)
     
     # Add doctor and patient names to response
     response = AppointmentResponse.from_orm(new_appointment)
-    response.doctor_name = f"{doctor.first_name} {doctor.last_name}"
+    response.doctor_name = f"{row.first_name} {row.last_name}"
     response.patient_name = f"{patient.first_name} {patient.last_name}"
-    response.service_name = service.name
+    response.service_name = row.service_name
+    events.broker.publish("appointment.created", response.model_dump(mode="json"))
     
     return response
 
+@app.post("/api/appointments/batch", dependencies=[Depends(get_current_admin)])
+async def import_appointments_batch(
+    request: Request,
+    import_format: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """CSV (text/csv) veya NDJSON gövdesinden toplu randevu oluştur; sonuç satır satır döner"""
+    if import_format is None:
+        content_type = request.headers.get("content-type", "")
+        import_format = "csv" if "csv" in content_type else "ndjson"
+    result = await importer.import_appointments(db, importer.iter_lines(request.stream()), import_format)
+    if result["created"]:
+        events.broker.publish("appointments.imported", {"created": result["created"]})
+    return JSONResponse(result)
+
+#  HASTA ARAMA — ADMIN PANELİ
+@app.get("/api/patients/search", response_model=PatientSearchPage, dependencies=[Depends(get_current_admin)])
+async def search_patients(
+    q: str = Query(..., min_length=patient_search.SEARCH_MIN_LENGTH, max_length=100),
+    mode: str = Query("prefix", pattern="^(prefix|substring)$"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Ad, soyad, e-posta ve telefonda arama (Türkçe karakterler sadeleştirilir); id'ye göre azalan"""
+    before_id = None
+    if cursor:
+        if not cursor.isdigit():
+            raise HTTPException(status_code=400, detail="Geçersiz cursor")
+        before_id = int(cursor)
+    patients, has_more = await patient_search.search(db, q, mode, limit, before_id)
+    return PatientSearchPage(
+        items=patients,
+        next_cursor=str(patients[-1].id) if has_more else None,
+    )
+
 @app.get("/api/appointments/patient/{patient_id}", response_model=List[AppointmentResponse])
-def get_patient_appointments(patient_id: int, db: Session = Depends(get_db)):
-    appointments = db.query(models.Appointment).filter(
-        models.Appointment.patient_id == patient_id
-    ).order_by(models.Appointment.appointment_date.desc()).all()
+async def get_patient_appointments(patient_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Güncel ve arşivlenmiş randevular birlikte (bkz. archive.py)"""
+    rows = (await db.execute(archive.patient_history_query(patient_id))).all()
     
-    result = []
-    for apt in appointments:
-        doctor = db.query(models.Doctor).filter(models.Doctor.id == apt.doctor_id).first()
-        patient = db.query(models.Patient).filter(models.Patient.id == apt.patient_id).first()
-        service = db.query(models.Service).filter(models.Service.id == apt.service_id).first()
-        
-        apt_response = AppointmentResponse.from_orm(apt)
-        apt_response.doctor_name = f"{doctor.first_name} {doctor.last_name}" if doctor else None
-        apt_response.patient_name = f"{patient.first_name} {patient.last_name}" if patient else None
-        apt_response.service_name = service.name if service else None
-        result.append(apt_response)
-    
-    return result
+    return appointment_list_response([serialization.appointment_row(row) for row in rows])
 
 @app.get("/api/appointments/email/{email}", response_model=List[AppointmentResponse])
-def get_appointments_by_email(email: str, db: Session = Depends(get_db)):
+async def get_appointments_by_email(email: str, db: AsyncSession = Depends(get_async_db)):
     """Email adresine göre randevuları getir"""
-    patient = db.query(models.Patient).filter(models.Patient.email == email).first()
+    patient = await db.scalar(select(models.Patient).where(models.Patient.email == email))
     if not patient:
         return []
     
-    return get_patient_appointments(patient.id, db)
+    return await get_patient_appointments(patient.id, db)
 
 @app.delete("/api/appointments/{appointment_id}")
-def cancel_appointment(appointment_id: int, db: Session = Depends(get_db)):
-    appointment = db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
-    if not appointment:
+async def cancel_appointment(appointment_id: int, db: AsyncSession = Depends(get_async_db)):
+    changed, current = await transition_status(db, [appointment_id], "cancelled")
+    if appointment_id not in current:
         raise HTTPException(status_code=404, detail="Randevu bulunamadı")
     
-    appointment.status = "cancelled"
-    db.commit()
+    await db.commit()
+    for row in changed:
+        availability.occupancy_cache.invalidate(row.doctor_id, row.appointment_date)
+        publish_status_change(row)
     
     return {"message": "Randevu iptal edildi"}
 
+def encode_change_cursor(change_seq: int, appointment_id: int) -> str:
+    raw = f"{change_seq}|{appointment_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_change_cursor(since: str):
+    """since: önceki yanıttaki next_cursor veya ISO-8601 zaman damgası.
+
+    Dönüş: ("seq", (change_seq, id)) veya ("time", updated_at).
+    """
+    try:
+        moment = datetime.fromisoformat(since)
+    except ValueError:
+        pass
+    else:
+        # updated_at is stored as naive UTC
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        return "time", moment
+    try:
+        raw_position, raw_id = base64.urlsafe_b64decode(since.encode()).decode().split("|")
+        if raw_position.isdigit():
+            return "seq", (int(raw_position), int(raw_id))
+        # Cursor from the earlier (updated_at, id) format
+        return "time", datetime.fromisoformat(raw_position)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Geçersiz cursor")
+
+#  DEĞİŞİKLİK AKIŞI — since'ten sonra eklenen veya güncellenen randevular
+@app.get("/api/appointments/changes", response_model=AppointmentChanges, dependencies=[Depends(get_current_admin)])
+async def get_appointment_changes(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Commit sırasıyla (change_seq, id) değişen randevular; iptaller de durum değişikliği olarak döner.
+
+    İstemci dönen next_cursor'ı saklar ve bir sonraki istekte since olarak gönderir.
+    ISO-8601 zaman, updated_at'i o andan sonra olan satırlardan başlar.
+    """
+    query = appointment_list_query()
+    if serialization.FAST_JSON_RESPONSES:
+        # Column rows carry the cursor position after the response columns
+        query = query.add_columns(models.Appointment.change_seq)
+    if since:
+        kind, position = decode_change_cursor(since)
+        if kind == "seq":
+            query = query.where(tuple_(models.Appointment.change_seq, models.Appointment.id) > tuple_(*position))
+        else:
+            query = query.where(models.Appointment.updated_at > position)
+    appointments = await fetch_appointment_list(db, query.order_by(
+        models.Appointment.change_seq,
+        models.Appointment.id,
+    ).limit(limit + 1))
+
+    has_more = len(appointments) > limit
+    appointments = appointments[:limit]
+    if appointments:
+        next_cursor = encode_change_cursor(appointments[-1].change_seq, appointments[-1].id)
+    elif since:
+        next_cursor = since
+    else:
+        next_cursor = encode_change_cursor(0, 0)
+
+    return appointment_list_response({
+        "items": appointment_list_items(appointments),
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }, AppointmentChanges)
+
 @app.get("/api/appointments/{appointment_id}", response_model=AppointmentResponse)
-def get_appointment(appointment_id: int, db: Session = Depends(get_db)):
-    appointment = db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
+async def get_appointment(appointment_id: int, db: AsyncSession = Depends(get_async_db)):
+    appointment = await db.scalar(appointment_query().where(models.Appointment.id == appointment_id))
     if not appointment:
-        raise HTTPException(status_code=404, detail="Randevu bulunamadı")
-    
-    doctor = db.query(models.Doctor).filter(models.Doctor.id == appointment.doctor_id).first()
-    patient = db.query(models.Patient).filter(models.Patient.id == appointment.patient_id).first()
-    service = db.query(models.Service).filter(models.Service.id == appointment.service_id).first()
-    
-    apt_response = AppointmentResponse.from_orm(appointment)
-    apt_response.doctor_name = f"{doctor.first_name} {doctor.last_name}" if doctor else None
-    apt_response.patient_name = f"{patient.first_name} {patient.last_name}" if patient else None
-    apt_response.service_name = service.name if service else None
-    
-    return apt_response
+        # Past visits may have been moved to the archive
+        row = (await db.execute(
+            serialization.appointment_rows_query(models.ArchivedAppointment)
+            .where(models.ArchivedAppointment.id == appointment_id)
+        )).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Randevu bulunamadı")
+        return serialization.appointment_row(row)
+    
+    return appointment_response(appointment)
+
+def encode_cursor(apt: models.Appointment) -> str:
+    raw = f"{apt.appointment_date.isoformat()}|{apt.appointment_time.isoformat()}|{apt.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        raw_date, raw_time, raw_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return date.fromisoformat(raw_date), time.fromisoformat(raw_time), int(raw_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Geçersiz cursor")
 
 #  TÜM RANDEVULARI LİSTELE — ADMIN PANELİ
-@app.get("/api/appointments", response_model=List[AppointmentResponse])
-def get_all_appointments(db: Session = Depends(get_db)):
-    appointments = db.query(models.Appointment).order_by(models.Appointment.appointment_date.desc()).all()
-
-    result = []
-    for apt in appointments:
-        doctor = db.query(models.Doctor).filter(models.Doctor.id == apt.doctor_id).first()
-        patient = db.query(models.Patient).filter(models.Patient.id == apt.patient_id).first()
-        service = db.query(models.Service).filter(models.Service.id == apt.service_id).first()
-
-        apt_response = AppointmentResponse.from_orm(apt)
-        apt_response.doctor_name = f"{doctor.first_name} {doctor.last_name}" if doctor else None
-        apt_response.patient_name = f"{patient.first_name} {patient.last_name}" if patient else None
-        apt_response.service_name = service.name if service else None
-
-        result.append(apt_response)
-    
-    return result
+@app.get("/api/appointments", response_model=AppointmentPage)
+async def get_all_appointments(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    doctor_id: Optional[int] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Randevuları (tarih, saat, id) üzerinden keyset sayfalama ile listeler"""
+    query = appointment_list_query()
+    if doctor_id is not None:
+        query = query.where(models.Appointment.doctor_id == doctor_id)
+    if status_filter:
+        query = query.where(models.Appointment.status == status_filter)
+    if date_from:
+        query = query.where(models.Appointment.appointment_date >= date_from)
+    if date_to:
+        query = query.where(models.Appointment.appointment_date <= date_to)
+    if cursor:
+        query = query.where(
+            tuple_(
+                models.Appointment.appointment_date,
+                models.Appointment.appointment_time,
+                models.Appointment.id,
+            ) < tuple_(*decode_cursor(cursor))
+        )
+
+    # Fetch one extra row to know whether another page exists
+    appointments = await fetch_appointment_list(db, query.order_by(
+        models.Appointment.appointment_date.desc(),
+        models.Appointment.appointment_time.desc(),
+        models.Appointment.id.desc(),
+    ).limit(limit + 1))
+
+    next_cursor = None
+    if len(appointments) > limit:
+        appointments = appointments[:limit]
+        next_cursor = encode_cursor(appointments[-1])
+
+    return appointment_list_response({
+        "items": appointment_list_items(appointments),
+        "next_cursor": next_cursor,
+    }, AppointmentPage)
 
 
 
 #  RANDEVU ONAYLAMA
 @app.put("/api/appointments/{appointment_id}/approve", response_model=AppointmentResponse)
-def approve_appointment(appointment_id: int, db: Session = Depends(get_db)):
-    appointment = db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
-    if not appointment:
+async def approve_appointment(appointment_id: int, db: AsyncSession = Depends(get_async_db)):
+    # A cancelled slot may have been booked again; it is never reactivated here
+    changed, current = await transition_status(db, [appointment_id], "approved", skip=("cancelled",))
+    if appointment_id not in current:
         raise HTTPException(status_code=404, detail="Randevu bulunamadı")
+    if current[appointment_id] == "cancelled":
+        raise HTTPException(status_code=409, detail="İptal edilmiş randevu yeniden etkinleştirilemez")
     
-    appointment.status = "approved"
-    db.commit()
-    db.refresh(appointment)
+    await db.commit()
+    for row in changed:
+        availability.occupancy_cache.invalidate(row.doctor_id, row.appointment_date)
+        publish_status_change(row)
     
-    return appointment
+    return await db.get(models.Appointment, appointment_id)
 
 
 
 #  RANDEVU REDDETME
 @app.put("/api/appointments/{appointment_id}/reject", response_model=AppointmentResponse)
-def reject_appointment(appointment_id: int, db: Session = Depends(get_db)):
-    appointment = db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
-    if not appointment:
+async def reject_appointment(appointment_id: int, db: AsyncSession = Depends(get_async_db)):
+    # A cancelled slot may have been booked again; it is never reactivated here
+    changed, current = await transition_status(db, [appointment_id], "rejected", skip=("cancelled",))
+    if appointment_id not in current:
         raise HTTPException(status_code=404, detail="Randevu bulunamadı")
-    
-    appointment.status = "rejected"
-    db.commit()
-    db.refresh(appointment)
-    
-    return appointment
+    if current[appointment_id] == "cancelled":
+        raise HTTPException(status_code=409, detail="İptal edilmiş randevu yeniden etkinleştirilemez")
+    
+    await db.commit()
+    for row in changed:
+        availability.occupancy_cache.invalidate(row.doctor_id, row.appointment_date)
+        publish_status_change(row)
+    
+    return await db.get(models.Appointment, appointment_id)
+
+
+#  TOPLU DURUM DEĞİŞİKLİĞİ
+@app.post("/api/appointments/bulk-status", dependencies=[Depends(get_current_admin)])
+async def bulk_update_status(payload: BulkStatusUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Randevuları eski durum başına bir UPDATE ile payload.status durumuna geçirir; sonuç id başına döner.
+
+    Bulunamayan, zaten hedef durumda olan veya son durumdaki (iptal, red,
+    tamamlandı) randevular değiştirilmez.
+    """
+    ids = list(dict.fromkeys(payload.ids))
+    # Deltas come from the guarded UPDATEs themselves, never from an earlier read
+    changed, current = await transition_status(db, ids, payload.status, skip=FINAL_STATUSES)
+    if changed:
+        await db.commit()
+
+    updated = {row.id for row in changed}
+    results = []
+    for appointment_id in ids:
+        if appointment_id in updated:
+            results.append({"id": appointment_id, "outcome": "updated", "status": payload.status})
+        elif appointment_id not in current:
+            results.append({"id": appointment_id, "outcome": "not_found", "status": None})
+        elif current[appointment_id] == payload.status:
+            results.append({"id": appointment_id, "outcome": "unchanged", "status": payload.status})
+        else:
+            results.append({"id": appointment_id, "outcome": "final", "status": current[appointment_id]})
+
+    if changed:
+        availability.occupancy_cache.invalidate_many({(row.doctor_id, row.appointment_date) for row in changed})
+        events.broker.publish("appointments.status", {
+            "status": payload.status,
+            "items": [
+                {"id": row.id, "doctor_id": row.doctor_id, "appointment_date": row.appointment_date.isoformat()}
+                for row in changed
+            ],
+        })
+    return {"updated": len(changed), "results": results}
+
+#  CANLI RANDEVU OLAYLARI (SSE)
+@app.get("/api/events")
+async def stream_events(request: Request, token: Optional[str] = None):
+    """Randevu oluşturma ve durum değişikliği olayları (text/event-stream).
+
+    EventSource başlık gönderemediği için token query parametresiyle de kabul edilir.
+    """
+    if token is None:
+        scheme, _, value = request.headers.get("authorization", "").partition(" ")
+        token = value if scheme.lower() == "bearer" else None
+    if not token or decode_access_token(token) is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    last_event_id = request.headers.get("last-event-id")
+    queue = events.broker.subscribe(int(last_event_id) if last_event_id and last_event_id.isdigit() else None)
+    return StreamingResponse(
+        events.stream(queue, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+#  YÖNETİM PANELİ İSTATİSTİKLERİ
+@app.get("/api/dashboard/stats", dependencies=[Depends(get_current_admin)])
+async def get_dashboard_stats(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Durum, doktor ve gün bazında randevu sayıları ve gelir (varsayılan: bugün ±30 gün)"""
+    today = date.today()
+    date_from = date_from or today - timedelta(days=30)
+    date_to = date_to or today + timedelta(days=30)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih aralığı")
+    return await stats.dashboard(db, date_from, date_to)
 
 
 if __name__ == "__main__":
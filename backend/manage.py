@@ -0,0 +1,263 @@
+"""Yönetim komutları.
+
+Şema oluşturma ve varsayılan admin kullanıcısı gibi tek seferlik işler
+uygulama import edilirken değil, buradan (veya BOOTSTRAP_ON_STARTUP ile
+lifespan içinde) bir kez çalıştırılır:
+
+    python manage.py bootstrap
+    python manage.py create-admin --username admin --password admin123 --reset-password
+    python manage.py import-appointments randevular.csv
+    python manage.py seed --appointments 100000
+    python manage.py explain-indexes
+    python manage.py rebuild-stats --from 2025-01-01
+    python manage.py archive-appointments --days 365
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import models
+from auth import get_password_hash
+from database import engine
+
+DEFAULT_ADMIN_USERNAME = "admin"
+DEFAULT_ADMIN_PASSWORD = "admin123"
+
+
+def init_db():
+    """Eksik tabloları oluşturur (mevcut tablolara dokunmaz)"""
+    models.Base.metadata.create_all(bind=engine)
+    print("Database schema is up to date.")
+
+
+def create_default_admin(username: str = DEFAULT_ADMIN_USERNAME,
+                         password: str = DEFAULT_ADMIN_PASSWORD,
+                         reset_password: bool = False):
+    db = Session(bind=engine)
+    try:
+        user = db.query(models.Admin).filter(models.Admin.username == username).first()
+        if not user:
+            print(f"Creating admin user '{username}'...")
+            db.add(models.Admin(username=username, password_hash=get_password_hash(password)))
+            db.commit()
+            print("Admin user created.")
+        elif reset_password:
+            print(f"Admin user '{username}' exists. Resetting password...")
+            user.password_hash = get_password_hash(password)
+            db.commit()
+            print("Admin password reset.")
+        else:
+            print(f"Admin user '{username}' already exists.")
+    finally:
+        db.close()
+
+
+def bootstrap():
+    init_db()
+    create_default_admin()
+
+
+def import_appointments_file(path: str, fmt: str = None) -> dict:
+    """CSV/NDJSON dosyasındaki randevuları içe aktarır"""
+    import importer
+    from database import AsyncSessionLocal, async_engine
+
+    if fmt is None:
+        fmt = "csv" if path.lower().endswith(".csv") else "ndjson"
+
+    async def chunks():
+        with open(path, "rb") as handle:
+            while True:
+                data = handle.read(1 << 16)
+                if not data:
+                    break
+                yield data
+
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await importer.import_appointments(db, importer.iter_lines(chunks()), fmt)
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(run())
+
+
+def rebuild_stats(date_from: date = None, date_to: date = None) -> int:
+    """Panel özet tablosunu randevulardan yeniden üretir"""
+    import stats
+
+    db = Session(bind=engine)
+    try:
+        rows = stats.rebuild(db, date_from, date_to)
+    finally:
+        db.close()
+    print(f"Rebuilt {rows} daily stat rows.")
+    return rows
+
+
+def archive_appointments(days: int = None, batch_size: int = None, max_batches: int = None) -> int:
+    """Eski randevuları arşiv tablosuna taşır; yarıda kesilirse tekrar çalıştırmak yeterli"""
+    import archive
+
+    before = archive.cutoff(archive.ARCHIVE_AFTER_DAYS if days is None else days)
+    db = Session(bind=engine)
+    try:
+        moved = archive.archive(
+            db, before, batch_size or archive.ARCHIVE_BATCH_SIZE, max_batches,
+            progress=lambda total: print(f"  {total} archived...", flush=True),
+        )
+    finally:
+        db.close()
+    print(f"Archived {moved} appointments before {before.isoformat()}.")
+    return moved
+
+
+def index_checks(db: Session):
+    """(ad, sorgu, beklenen indeksler): sıcak yolların kullanması gereken indeksler"""
+    import availability
+
+    sample = db.execute(
+        select(models.Appointment.doctor_id, models.Appointment.patient_id, models.Appointment.appointment_date)
+        .order_by(models.Appointment.id.desc()).limit(1)
+    ).first()
+    if sample is None:
+        return []
+    doctor_id, patient_id, day = sample
+    return [
+        (
+            "availability / booking conflict",
+            availability.occupancy_query([doctor_id], day, day + timedelta(days=6)),
+            ("unique_appointment", "ix_appointments_doctor_listing"),
+        ),
+        (
+            "patient history",
+            select(models.Appointment)
+            .where(models.Appointment.patient_id == patient_id)
+            .order_by(models.Appointment.appointment_date.desc()),
+            ("ix_appointments_patient_history",),
+        ),
+        (
+            "patient history (archive)",
+            select(models.ArchivedAppointment)
+            .where(models.ArchivedAppointment.patient_id == patient_id)
+            .order_by(models.ArchivedAppointment.appointment_date.desc()),
+            ("ix_appointments_archive_patient_history",),
+        ),
+    ]
+
+
+def explain(db: Session, statement) -> str:
+    """Sorgunun gerçek parametrelerle planı (PostgreSQL EXPLAIN / SQLite EXPLAIN QUERY PLAN)"""
+    compiled = statement.compile(bind=engine, compile_kwargs={"render_postcompile": True})
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    rows = db.connection().exec_driver_sql(prefix + str(compiled), params).all()
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def explain_indexes() -> bool:
+    """Sıcak yol sorgularının beklenen indeksleri kullandığını kontrol eder"""
+    db = Session(bind=engine)
+    try:
+        checks = index_checks(db)
+        if not checks:
+            print("No appointments found; run `python manage.py seed` first.")
+            return False
+        ok = True
+        for name, statement, expected in checks:
+            plan = explain(db, statement)
+            used = [index for index in expected if index in plan]
+            if used:
+                print(f"OK       {name}: {used[0]}")
+            else:
+                ok = False
+                print(f"MISSING  {name}: expected one of {', '.join(expected)}")
+            print("         " + plan.replace("\n", "\n         "))
+        return ok
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diş Kliniği yönetim komutları")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("init-db", help="Eksik tabloları oluştur")
+    subparsers.add_parser("bootstrap", help="Şemayı ve varsayılan admin kullanıcısını hazırla")
+
+    admin_parser = subparsers.add_parser("create-admin", help="Admin kullanıcısı oluştur")
+    admin_parser.add_argument("--username", default=DEFAULT_ADMIN_USERNAME)
+    admin_parser.add_argument("--password", default=DEFAULT_ADMIN_PASSWORD)
+    admin_parser.add_argument("--reset-password", action="store_true",
+                              help="Kullanıcı varsa şifresini sıfırla")
+
+    import_parser = subparsers.add_parser("import-appointments", help="CSV/NDJSON dosyasından randevu aktar")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=["csv", "ndjson"],
+                               help="Varsayılan: dosya uzantısından")
+    import_parser.add_argument("--errors", help="Hatalı satırları bu dosyaya NDJSON olarak yaz")
+
+    seed_parser = subparsers.add_parser("seed", help="Büyük örnek veri seti ekle")
+    seed_parser.add_argument("--appointments", type=int, default=100_000)
+    seed_parser.add_argument("--doctors", type=int, default=20)
+    seed_parser.add_argument("--patients", type=int)
+
+    explain_parser = subparsers.add_parser("explain-indexes", help="Sıcak yol sorgularının indeks kullanımını kontrol et")
+    explain_parser.add_argument("--seed", type=int, metavar="N",
+                                help="Kontrolden önce N randevuluk örnek veri ekle")
+
+    stats_parser = subparsers.add_parser("rebuild-stats", help="Panel özet tablosunu yeniden üret")
+    stats_parser.add_argument("--from", dest="date_from", type=date.fromisoformat)
+    stats_parser.add_argument("--to", dest="date_to", type=date.fromisoformat)
+
+    archive_parser = subparsers.add_parser("archive-appointments", help="Eski randevuları arşiv tablosuna taşı")
+    archive_parser.add_argument("--days", type=int,
+                                help="Bu kadar günden eski randevular (varsayılan: ARCHIVE_AFTER_DAYS)")
+    archive_parser.add_argument("--batch-size", type=int, help="Parti başına randevu (varsayılan: ARCHIVE_BATCH_SIZE)")
+    archive_parser.add_argument("--max-batches", type=int, help="Bu kadar partiden sonra dur")
+
+    args = parser.parse_args(argv)
+    if args.command == "init-db":
+        init_db()
+    elif args.command == "bootstrap":
+        bootstrap()
+    elif args.command == "create-admin":
+        create_default_admin(args.username, args.password, args.reset_password)
+    elif args.command == "import-appointments":
+        result = import_appointments_file(args.path, args.format)
+        print(f"Created: {result['created']}, failed: {result['failed']}")
+        errors = [entry for entry in result["results"] if entry["status"] == "error"]
+        if args.errors:
+            with open(args.errors, "w", encoding="utf-8") as handle:
+                for entry in errors:
+                    handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        else:
+            for entry in errors[:20]:
+                print(f"  row {entry['row']}: {entry['detail']}")
+        return 1 if result["failed"] else 0
+    elif args.command == "seed":
+        from seed import seed
+        print(seed(args.appointments, args.doctors, args.patients))
+    elif args.command == "explain-indexes":
+        if args.seed:
+            from seed import seed
+            print(seed(args.seed))
+        return 0 if explain_indexes() else 1
+    elif args.command == "rebuild-stats":
+        rebuild_stats(args.date_from, args.date_to)
+    elif args.command == "archive-appointments":
+        archive_appointments(args.days, args.batch_size, args.max_batches)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
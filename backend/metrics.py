@@ -0,0 +1,211 @@
+"""Uygulama metrikleri (Prometheus metin formatı).
+
+MetricsMiddleware her isteğin süresini ve durum kodunu route şablonuna göre
+kaydeder. SQLAlchemy before/after_cursor_execute olayları, o istek boyunca
+çalışan SQL sorgularını ve veritabanında geçen süreyi sayar; böylece N+1
+gibi sorgu patlamaları route başına sorgu sayısında görünür.
+"""
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+import time
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class RequestStats:
+    """Tek bir isteğin SQL sayaçları"""
+
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.responses: Dict[Tuple[str, str, str], int] = {}
+        self.queries: Dict[Tuple[str, str], Histogram] = {}
+        self.db_seconds: Dict[Tuple[str, str], float] = {}
+        # (method, route, encoding) -> [responses, original bytes, sent bytes]
+        self.compression: Dict[Tuple[str, str, str], List[int]] = {}
+        self.queries_outside_requests = 0
+
+    def record_request(self, method: str, route: str, status_code: int,
+                       seconds: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            status_key = (method, route, str(status_code))
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+            self.queries.setdefault(key, Histogram(QUERY_COUNT_BUCKETS)).observe(stats.queries)
+            self.db_seconds[key] = self.db_seconds.get(key, 0.0) + stats.db_seconds
+
+    def record_compression(self, method: str, route: str, encoding: str,
+                           original_bytes: int, sent_bytes: int) -> None:
+        with self._lock:
+            totals = self.compression.setdefault((method, route, encoding), [0, 0, 0])
+            totals[0] += 1
+            totals[1] += original_bytes
+            totals[2] += sent_bytes
+
+    def record_query_outside_request(self) -> None:
+        with self._lock:
+            self.queries_outside_requests += 1
+
+    def render(self, extra_gauges: Iterable[Tuple[str, str, Dict[str, str], float]] = ()) -> str:
+        lines: List[str] = []
+        with self._lock:
+            _render_histograms(
+                lines, "http_request_duration_seconds",
+                "HTTP request latency by route", self.latency,
+            )
+            lines.append("# HELP http_responses_total HTTP responses by route and status code")
+            lines.append("# TYPE http_responses_total counter")
+            for (method, route, code), value in sorted(self.responses.items()):
+                lines.append(f"http_responses_total{_labels(method=method, route=route, status=code)} {value}")
+            _render_histograms(
+                lines, "http_request_sql_queries",
+                "SQL statements executed per request", self.queries,
+            )
+            lines.append("# HELP http_request_db_seconds_total Time spent in SQL statements by route")
+            lines.append("# TYPE http_request_db_seconds_total counter")
+            for (method, route), value in sorted(self.db_seconds.items()):
+                lines.append(f"http_request_db_seconds_total{_labels(method=method, route=route)} {value:.6f}")
+            for name, help_text, index in (
+                ("http_compressed_responses_total", "Compressed responses by route and encoding", 0),
+                ("http_response_bytes_original_total", "Response bytes before compression", 1),
+                ("http_response_bytes_sent_total", "Response bytes after compression", 2),
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for (method, route, encoding), totals in sorted(self.compression.items()):
+                    lines.append(f"{name}{_labels(method=method, route=route, encoding=encoding)} {totals[index]}")
+            lines.append("# HELP http_response_bytes_saved_total Bytes saved by compression by route")
+            lines.append("# TYPE http_response_bytes_saved_total counter")
+            for (method, route, encoding), totals in sorted(self.compression.items()):
+                lines.append(
+                    f"http_response_bytes_saved_total{_labels(method=method, route=route, encoding=encoding)} "
+                    f"{totals[1] - totals[2]}"
+                )
+            lines.append("# HELP sql_queries_outside_requests_total SQL statements not tied to an HTTP request")
+            lines.append("# TYPE sql_queries_outside_requests_total counter")
+            lines.append(f"sql_queries_outside_requests_total {self.queries_outside_requests}")
+
+        seen = set()
+        for name, help_text, labels, value in extra_gauges:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{_labels(**labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels: str) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _render_histograms(lines: List[str], name: str, help_text: str,
+                       histograms: Dict[Tuple[str, str], Histogram]) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for (method, route), histogram in sorted(histograms.items()):
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f"{name}_bucket{_labels(method=method, route=route, le=str(bound))} {count}")
+        lines.append(f"{name}_bucket{_labels(method=method, route=route, le='+Inf')} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route)} {histogram.total:.6f}")
+        lines.append(f"{name}_count{_labels(method=method, route=route)} {histogram.count}")
+
+
+registry = MetricsRegistry()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    if stats is None:
+        registry.record_query_outside_request()
+        return
+    stats.queries += 1
+    started = getattr(context, "_metrics_started", None)
+    if started is not None:
+        stats.db_seconds += time.perf_counter() - started
+
+
+def instrument_engine(engine) -> None:
+    """SQL sayaçlarını bir (sync) engine'e bağlar"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """İstek süresi, durum kodu ve SQL sayaçlarını route bazında kaydeder"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            route = scope.get("route")
+            registry.record_request(
+                scope["method"],
+                getattr(route, "path", "<unmatched>"),
+                status_code,
+                time.perf_counter() - started,
+                stats,
+            )
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Date, Time, DateTime, Text, ForeignKey, Numeric
+from sqlalchemy import BigInteger, Column, Integer, String, Date, Time, DateTime, Text, ForeignKey, Numeric, Index, DDL, event, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
+from textnorm import search_text_default
 
 class Patient(Base):
     __tablename__ = "patients"
@@ -13,9 +14,28 @@ class Patient(Base):
     phone = Column(String(20), nullable=False)
     date_of_birth = Column(Date)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Normalized name/email/phone for /api/patients/search (see patient_search.py);
+    # filled on single-row and executemany inserts; a multi-row VALUES insert and
+    # an UPDATE of those columns must set it explicitly (textnorm.build_search_text)
+    search_text = Column(Text, nullable=False, default=search_text_default, server_default="")
     
     appointments = relationship("Appointment", back_populates="patient")
 
+    __table_args__ = (
+        # Trigram index for LIKE '%term%' / '% term%'; SQLite uses the in-memory prefix index
+        Index(
+            "ix_patients_search_trgm", "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+event.listen(
+    Patient.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 class Doctor(Base):
     __tablename__ = "doctors"
     
@@ -41,11 +61,59 @@ class Appointment(Base):
     status = Column(String(20), default="scheduled")
     notes = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Set on insert and on every ORM/Core UPDATE
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Commit-ordered write counter; drives /api/appointments/changes (see changes.py)
+    change_seq = Column(BigInteger, nullable=False, server_default="0")
     
     patient = relationship("Patient", back_populates="appointments")
     doctor = relationship("Doctor", back_populates="appointments")
     service = relationship("Service")
 
+    # Keyset pagination indexes for the admin listing (see get_all_appointments)
+    __table_args__ = (
+        Index("ix_appointments_listing", "appointment_date", "appointment_time", "id"),
+        Index("ix_appointments_doctor_listing", "doctor_id", "appointment_date", "appointment_time", "id"),
+        Index("ix_appointments_status_listing", "status", "appointment_date", "appointment_time", "id"),
+        # Patient history: WHERE patient_id = ? ORDER BY appointment_date DESC
+        Index("ix_appointments_patient_history", "patient_id", "appointment_date"),
+        # Delta sync: WHERE (change_seq, id) > cursor ORDER BY change_seq, id
+        Index("ix_appointments_changes", "change_seq", "id"),
+        # Delta sync started from an ISO time or a legacy cursor: WHERE updated_at > ?
+        Index("ix_appointments_updated_at", "updated_at"),
+        # One active booking per doctor and start time; cancelled slots can be rebooked
+        Index(
+            "unique_appointment", "doctor_id", "appointment_date", "appointment_time",
+            unique=True,
+            postgresql_where=text("status != 'cancelled'"),
+            sqlite_where=text("status != 'cancelled'"),
+        ),
+        # SQLite would otherwise reuse the highest id once it is archived (see archive.py)
+        {"sqlite_autoincrement": True},
+    )
+
+class ArchivedAppointment(Base):
+    """Arşivlenmiş geçmiş randevular; sütunlar appointments ile aynı (bkz. archive.py)"""
+    __tablename__ = "appointments_archive"
+    
+    # Original appointment id, kept so links and cursors stay valid
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    patient_id = Column(Integer, ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
+    doctor_id = Column(Integer, ForeignKey("doctors.id", ondelete="CASCADE"), nullable=False)
+    service_id = Column(Integer, ForeignKey("services.id", ondelete="CASCADE"), nullable=False)
+    appointment_date = Column(Date, nullable=False)
+    appointment_time = Column(Time, nullable=False)
+    status = Column(String(20))
+    notes = Column(Text)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Patient history reads both tables with the same filter and order
+        Index("ix_appointments_archive_patient_history", "patient_id", "appointment_date"),
+    )
+
 class Service(Base):
     __tablename__ = "services"
     
@@ -63,3 +131,21 @@ class Admin(Base):
     username = Column(String(50), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class AppointmentDailyStat(Base):
+    """Günlük randevu özeti; randevu yazan uç noktalar artımlı günceller (bkz. stats.py)"""
+    __tablename__ = "appointment_daily_stats"
+    
+    appointment_date = Column(Date, primary_key=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.id", ondelete="CASCADE"), primary_key=True)
+    service_id = Column(Integer, ForeignKey("services.id", ondelete="CASCADE"), primary_key=True)
+    status = Column(String(20), primary_key=True)
+    appointment_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(12, 2), nullable=False, default=0)
+
+class AppointmentChangeCounter(Base):
+    """Değişiklik akışı sayacı; tek satır (bkz. changes.py)"""
+    __tablename__ = "appointment_change_counter"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    value = Column(BigInteger, nullable=False)
@@ -0,0 +1,168 @@
+"""Hasta arama (ad, soyad, e-posta, telefon).
+
+Aranan alanlar patients.search_text sütununda sadeleştirilmiş olarak
+tutulur (bkz. textnorm.py), örneğin " sukru ozturk sukru@example.com 05321234567".
+Sorgu da aynı şekilde sadeleştirilir; her terim eşleşmelidir (AND).
+
+- prefix: terim bir kelimenin başıdır (LIKE '% terim%')
+- substring: terim herhangi bir yerde geçer (LIKE '%terim%')
+
+PostgreSQL'de iki mod da pg_trgm GIN indeksinden (ix_patients_search_trgm)
+yararlanır. SQLite'ta trigram indeksi yoktur: prefix aramaları süreç
+içindeki PrefixIndex'ten yapılır, substring araması tablo taramasıdır.
+Sonuçlar id'ye göre azalan sırada, keyset sayfalama ile döner.
+"""
+from array import array
+from bisect import bisect_left, insort
+from typing import List, Optional, Set, Tuple
+import asyncio
+import heapq
+import re
+import sys
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from textnorm import digits, normalize
+
+SEARCH_MIN_LENGTH = 2
+# Pending entries are merged into the sorted arrays above this size
+PENDING_MERGE_SIZE = 5000
+_PHONE_QUERY = re.compile(r"^[\d\s\-\(\)\+\.]+$")
+
+
+def query_terms(q: str) -> List[str]:
+    """Arama metni -> sadeleştirilmiş terimler; telefon gibi yazılmış sorgu tek terim olur"""
+    if _PHONE_QUERY.match(q):
+        return [digits(q)] if digits(q) else []
+    return normalize(q).split()
+
+
+def _like_escape(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class PrefixIndex:
+    """search_text kelimeleri -> hasta id'leri (SQLite için).
+
+    Kelimeler sıralı bir listede, id'ler paralel bir dizide tutulur; bir
+    önekle başlayan kelimeler iki bisect ile bulunur. Yeni hastalar her
+    aramadan önce id > max_id sorgusuyla küçük bir bekleyen listeye eklenir
+    ve liste büyüyünce ana dizilere birleştirilir. Hasta güncellemesi veya
+    silinmesi yansımaz; silinen hastalar sonuç sorgusunda elenir.
+    """
+
+    def __init__(self):
+        # (sorted words, parallel ids); replaced as one object so readers never mix two builds
+        self.sorted: Tuple[List[str], array] = ([], array("q"))
+        self.pending: List[Tuple[str, int]] = []
+        self.max_id = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+    def _refresh_lock(self) -> asyncio.Lock:
+        # A lock binds to the loop it first waits on; tests and repeated
+        # asyncio.run() calls need a new one for each loop
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        return self._lock
+
+    async def refresh(self, db: AsyncSession) -> None:
+        async with self._refresh_lock():
+            rows = (await db.execute(
+                select(models.Patient.id, models.Patient.search_text)
+                .where(models.Patient.id > self.max_id)
+                .order_by(models.Patient.id)
+            )).all()
+            if not rows:
+                return
+            self.max_id = rows[-1][0]
+            if not self.sorted[0] or len(rows) > PENDING_MERGE_SIZE:
+                # Sorting a million patients takes seconds; keep it off the event loop
+                await asyncio.to_thread(self._merge, rows)
+            else:
+                for patient_id, text in rows:
+                    for word in text.split():
+                        insort(self.pending, (sys.intern(word), patient_id))
+                if len(self.pending) > PENDING_MERGE_SIZE:
+                    await asyncio.to_thread(self._merge, [])
+
+    def _merge(self, rows) -> None:
+        entries = list(zip(*self.sorted))
+        entries.extend(self.pending)
+        for patient_id, text in rows:
+            # Names repeat a lot; interning keeps one copy per distinct word
+            entries.extend((sys.intern(word), patient_id) for word in text.split())
+        entries.sort()
+        self.sorted = ([word for word, _ in entries], array("q", (patient_id for _, patient_id in entries)))
+        self.pending = []
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        words = self.sorted[0]
+        return bisect_left(words, prefix), bisect_left(words, prefix + "\U0010ffff")
+
+    def _count(self, prefix: str) -> int:
+        low, high = self._range(prefix)
+        return high - low
+
+    def lookup(self, prefix: str, within: Optional[Set[int]] = None) -> Set[int]:
+        """Öneke uyan hasta id'leri; within verilirse yalnızca onların içinden"""
+        low, high = self._range(prefix)
+        ids = self.sorted[1][low:high]
+        found = set(ids) if within is None else {patient_id for patient_id in ids if patient_id in within}
+        low = bisect_left(self.pending, (prefix,))
+        high = bisect_left(self.pending, (prefix + "\U0010ffff",))
+        found.update(
+            patient_id for _, patient_id in self.pending[low:high]
+            if within is None or patient_id in within
+        )
+        return found
+
+    def search(self, terms: List[str]) -> Set[int]:
+        matches: Optional[Set[int]] = None
+        # Most selective term first; later terms only filter the candidates
+        for term in sorted(terms, key=self._count):
+            matches = self.lookup(term, matches)
+            if not matches:
+                break
+        return matches or set()
+
+    def stats(self) -> dict:
+        return {"words": len(self.sorted[0]) + len(self.pending), "max_id": self.max_id}
+
+
+prefix_index = PrefixIndex()
+
+
+async def search(db: AsyncSession, q: str, mode: str = "prefix",
+                 limit: int = 20, before_id: Optional[int] = None) -> Tuple[list, bool]:
+    """(hasta listesi, devamı var mı); q en az SEARCH_MIN_LENGTH karakter olmalı"""
+    terms = query_terms(q)
+    if not terms:
+        return [], False
+
+    query = select(models.Patient).order_by(models.Patient.id.desc()).limit(limit + 1)
+    if before_id is not None:
+        query = query.where(models.Patient.id < before_id)
+
+    if mode == "prefix" and db.bind.dialect.name == "sqlite":
+        await prefix_index.refresh(db)
+        matches = prefix_index.search(terms)
+        if before_id is not None:
+            matches = (patient_id for patient_id in matches if patient_id < before_id)
+        # Only one page of ids is fetched from the database
+        page = heapq.nlargest(limit + 1, matches)
+        if not page:
+            return [], False
+        query = query.where(models.Patient.id.in_(page))
+    else:
+        pattern = "%{}%" if mode == "substring" else "% {}%"
+        query = query.where(*(
+            models.Patient.search_text.like(pattern.format(_like_escape(term)), escape="\\")
+            for term in terms
+        ))
+
+    patients = (await db.scalars(query)).all()
+    return patients[:limit], len(patients) > limit
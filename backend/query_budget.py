@@ -0,0 +1,325 @@
+"""Uç nokta başına SQL sorgu bütçesi kontrolü.
+
+main.py'deki her route geçici bir SQLite veritabanında iki farklı veri
+boyutuyla çağrılır; SQLAlchemy before_cursor_execute olayıyla o istek
+sırasında çalışan SQL ifadeleri sayılır. Bir route bütçesini aşarsa,
+sorgu sayısı veri büyüdükçe artarsa (N+1) veya BUDGETS içinde kaydı
+yoksa kontrol başarısız olur:
+
+    python query_budget.py
+
+Önbellekler her istekten önce temizlenir; ölçülen değer en kötü durumdur.
+Yeni bir route eklenirken BUDGETS ve REQUESTS'e de eklenmelidir.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+import json
+import os
+import sys
+import tempfile
+
+# Budget: maximum SQL statements for one request, independent of result size.
+# Counts are for SQLite; PostgreSQL adds one advisory-lock statement to bookings.
+# Every appointment write also bumps the change-feed counter (changes.py).
+BUDGETS: Dict[Tuple[str, str], int] = {
+    ("POST", "/api/login"): 1,
+    ("POST", "/api/logout"): 0,
+    ("GET", "/"): 0,
+    ("GET", "/api/cache/stats"): 0,
+    ("GET", "/api/pool/stats"): 0,
+    ("GET", "/metrics"): 0,
+    ("GET", "/api/doctors"): 1,
+    ("GET", "/api/doctors/{doctor_id}"): 1,
+    ("POST", "/api/doctors"): 3,
+    ("PUT", "/api/doctors/{doctor_id}"): 3,
+    ("DELETE", "/api/doctors/{doctor_id}"): 3,
+    ("GET", "/api/services"): 1,
+    ("POST", "/api/services"): 2,
+    # A price change also reprices the service's rollup rows (one UPDATE)
+    ("PUT", "/api/services/{service_id}"): 4,
+    ("DELETE", "/api/services/{service_id}"): 2,
+    ("GET", "/api/appointments/available"): 2,
+    ("POST", "/api/appointments"): 6,
+    # Includes new patients: one multi-row INSERT and one id lookup
+    ("POST", "/api/appointments/batch"): 9,
+    ("GET", "/api/appointments/patient/{patient_id}"): 1,
+    # SQLite prefix mode: index refresh (id > max_id) + one page; PostgreSQL: one LIKE query
+    ("GET", "/api/patients/search"): 2,
+    ("GET", "/api/appointments/email/{email}"): 2,
+    ("DELETE", "/api/appointments/{appointment_id}"): 4,
+    ("GET", "/api/appointments/{appointment_id}"): 1,
+    ("GET", "/api/appointments/changes"): 1,
+    ("GET", "/api/appointments"): 1,
+    ("PUT", "/api/appointments/{appointment_id}/approve"): 5,
+    ("PUT", "/api/appointments/{appointment_id}/reject"): 5,
+    ("POST", "/api/appointments/bulk-status"): 4,
+    ("GET", "/api/dashboard/stats"): 1,
+    ("GET", "/api/events/stats"): 0,
+    ("GET", "/api/events"): 0,
+}
+
+# Long-lived streams are never measured (the request does not end); the
+# budget documents that connecting runs no SQL (token checked without the DB).
+STREAMING = {("GET", "/api/events")}
+
+
+def _booking(ctx: dict, day: str, slot: str, email: Optional[str] = None) -> dict:
+    return {
+        "first_name": "Bütçe",
+        "last_name": "Hasta",
+        "email": email or ctx["email"],
+        "phone": "05000000000",
+        "doctor_id": ctx["doctor_id"],
+        "service_id": ctx["service_id"],
+        "appointment_date": day,
+        "appointment_time": slot,
+    }
+
+
+# (method, path) -> function(ctx) returning keyword arguments for TestClient.request
+REQUESTS: Dict[Tuple[str, str], Callable[[dict], dict]] = {
+    ("POST", "/api/login"): lambda ctx: {"url": "/api/login", "data": ctx["admin"]},
+    ("POST", "/api/logout"): lambda ctx: {"url": "/api/logout"},
+    ("GET", "/"): lambda ctx: {"url": "/"},
+    ("GET", "/api/cache/stats"): lambda ctx: {"url": "/api/cache/stats"},
+    ("GET", "/api/pool/stats"): lambda ctx: {"url": "/api/pool/stats"},
+    ("GET", "/metrics"): lambda ctx: {"url": "/metrics"},
+    ("GET", "/api/doctors"): lambda ctx: {"url": "/api/doctors"},
+    ("GET", "/api/doctors/{doctor_id}"): lambda ctx: {"url": f"/api/doctors/{ctx['doctor_id']}"},
+    ("POST", "/api/doctors"): lambda ctx: {"url": "/api/doctors", "json": {
+        "first_name": "Yeni", "last_name": "Doktor", "email": f"yeni-{ctx['phase']}@example.com",
+    }},
+    ("PUT", "/api/doctors/{doctor_id}"): lambda ctx: {
+        "url": f"/api/doctors/{ctx['spare_doctor_id']}", "json": {"phone": "05001112233"},
+    },
+    ("DELETE", "/api/doctors/{doctor_id}"): lambda ctx: {"url": f"/api/doctors/{ctx['spare_doctor_id']}"},
+    ("GET", "/api/services"): lambda ctx: {"url": "/api/services"},
+    ("POST", "/api/services"): lambda ctx: {"url": "/api/services", "json": {
+        "name": f"Yeni hizmet {ctx['phase']}", "duration_minutes": 30, "price": 100,
+    }},
+    ("PUT", "/api/services/{service_id}"): lambda ctx: {
+        "url": f"/api/services/{ctx['spare_service_id']}", "json": {"price": 150},
+    },
+    ("DELETE", "/api/services/{service_id}"): lambda ctx: {"url": f"/api/services/{ctx['spare_service_id']}"},
+    ("GET", "/api/appointments/available"): lambda ctx: {"url": "/api/appointments/available", "params": {
+        "doctor_id": ctx["doctor_id"], "start_date": ctx["day"], "end_date": ctx["last_day"],
+        "service_id": ctx["service_id"],
+    }},
+    ("POST", "/api/appointments"): lambda ctx: {
+        "url": "/api/appointments", "json": _booking(ctx, ctx["free_day"], "09:00"),
+    },
+    ("POST", "/api/appointments/batch"): lambda ctx: {
+        "url": "/api/appointments/batch",
+        "params": {"format": "ndjson"},
+        # One existing patient and three new ones (created in one INSERT)
+        "content": "\n".join(
+            json.dumps(_booking(ctx, ctx["free_day"], slot, email))
+            for slot, email in (
+                ("10:00", None),
+                *((slot, f"toplu-{ctx['phase']}-{i}@example.com") for i, slot in enumerate(("10:30", "11:00", "11:30"))),
+            )
+        ).encode(),
+    },
+    ("GET", "/api/appointments/patient/{patient_id}"): lambda ctx: {
+        "url": f"/api/appointments/patient/{ctx['patient_id']}",
+    },
+    ("GET", "/api/patients/search"): lambda ctx: {"url": "/api/patients/search", "params": {"q": "hasta"}},
+    ("GET", "/api/appointments/email/{email}"): lambda ctx: {"url": f"/api/appointments/email/{ctx['email']}"},
+    ("DELETE", "/api/appointments/{appointment_id}"): lambda ctx: {
+        "url": f"/api/appointments/{ctx['appointment_ids'][0]}",
+    },
+    ("GET", "/api/appointments/{appointment_id}"): lambda ctx: {
+        "url": f"/api/appointments/{ctx['appointment_ids'][1]}",
+    },
+    ("GET", "/api/appointments"): lambda ctx: {"url": "/api/appointments", "params": {"limit": 500}},
+    ("GET", "/api/appointments/changes"): lambda ctx: {"url": "/api/appointments/changes", "params": {
+        "since": "2000-01-01T00:00:00", "limit": 1000,
+    }},
+    ("PUT", "/api/appointments/{appointment_id}/approve"): lambda ctx: {
+        "url": f"/api/appointments/{ctx['appointment_ids'][2]}/approve",
+    },
+    ("PUT", "/api/appointments/{appointment_id}/reject"): lambda ctx: {
+        "url": f"/api/appointments/{ctx['appointment_ids'][3]}/reject",
+    },
+    ("POST", "/api/appointments/bulk-status"): lambda ctx: {"url": "/api/appointments/bulk-status", "json": {
+        "ids": ctx["appointment_ids"][4:] + [0], "status": "approved",
+    }},
+    ("GET", "/api/dashboard/stats"): lambda ctx: {"url": "/api/dashboard/stats", "params": {
+        "date_from": ctx["day"], "date_to": ctx["last_day"],
+    }},
+    ("GET", "/api/events/stats"): lambda ctx: {"url": "/api/events/stats"},
+}
+
+# Dataset sizes (appointments) the counts are compared across
+DATASET_SIZES = (20, 3000)
+
+
+def _routes(app) -> List[Tuple[str, str]]:
+    from fastapi.routing import APIRoute
+
+    routes = []
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            for method in sorted(route.methods - {"HEAD", "OPTIONS"}):
+                routes.append((method, route.path))
+    return routes
+
+
+def _context(phase: int, admin: dict) -> dict:
+    """Ölçüm için kullanılan id'ler; en çok randevusu olan hasta seçilir"""
+    from datetime import timedelta
+
+    from sqlalchemy import func, insert, select
+    from sqlalchemy.orm import Session
+
+    import models
+    from database import engine
+
+    db = Session(bind=engine)
+    try:
+        patient_id, = db.execute(
+            select(models.Appointment.patient_id)
+            .group_by(models.Appointment.patient_id)
+            .order_by(func.count().desc(), models.Appointment.patient_id)
+            .limit(1)
+        ).one()
+        email = db.scalar(select(models.Patient.email).where(models.Patient.id == patient_id))
+        appointment_ids = db.scalars(
+            select(models.Appointment.id)
+            .where(models.Appointment.status == "scheduled")
+            .order_by(models.Appointment.id.desc()).limit(6)
+        ).all()
+        doctor_id, service_id, day = db.execute(
+            select(models.Appointment.doctor_id, models.Appointment.service_id, models.Appointment.appointment_date)
+            .where(models.Appointment.id == appointment_ids[0])
+        ).one()
+        last_day = db.scalar(select(func.max(models.Appointment.appointment_date)))
+
+        # Spare rows the update/delete routes can consume
+        spare_doctor_id = db.scalar(insert(models.Doctor).values(
+            first_name="Yedek", last_name="Doktor", email=f"yedek-{phase}@example.com",
+        ).returning(models.Doctor.id))
+        spare_service_id = db.scalar(insert(models.Service).values(
+            name=f"Yedek hizmet {phase}", duration_minutes=30, price=100,
+        ).returning(models.Service.id))
+        db.commit()
+    finally:
+        db.close()
+
+    free_day = last_day + timedelta(days=7 * phase)
+    while free_day.weekday() >= 5:
+        free_day += timedelta(days=1)
+    return {
+        "phase": phase,
+        "admin": admin,
+        "patient_id": patient_id,
+        "email": email,
+        "appointment_ids": appointment_ids,
+        "doctor_id": doctor_id,
+        "service_id": service_id,
+        "spare_doctor_id": spare_doctor_id,
+        "spare_service_id": spare_service_id,
+        "day": day.isoformat(),
+        "last_day": min(last_day, day + timedelta(days=30)).isoformat(),
+        "free_day": free_day.isoformat(),
+    }
+
+
+def _clear_caches() -> None:
+    import availability
+    import catalog
+
+    availability.occupancy_cache.clear()
+    for name in ("doctors", "services"):
+        catalog.catalog_cache.invalidate(name)
+
+
+def measure(client, routes: List[Tuple[str, str]], ctx: dict, counter: List[int]) -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """(method, path) -> (SQL sayısı, HTTP durum kodu)"""
+    results = {}
+    # Reads first, then writes, deletes last so the shared ids stay valid
+    order = {"GET": 0, "POST": 1, "PUT": 2, "DELETE": 3}
+    for method, path in sorted(routes, key=lambda key: order.get(key[0], 4)):
+        build = REQUESTS.get((method, path))
+        if build is None:
+            continue
+        _clear_caches()
+        counter[0] = 0
+        response = client.request(method, **build(ctx))
+        results[(method, path)] = (counter[0], response.status_code)
+    return results
+
+
+def check() -> bool:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    import main
+    import manage
+    from auth import shutdown_hash_executor
+    from database import async_engine, engine
+    from seed import seed
+
+    manage.init_db()
+    manage.create_default_admin()
+    admin = {"username": manage.DEFAULT_ADMIN_USERNAME, "password": manage.DEFAULT_ADMIN_PASSWORD}
+
+    counter = [0]
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        counter[0] += 1
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", count)
+
+    routes = _routes(main.app)
+    ok = True
+    for route in routes:
+        if route not in BUDGETS or (route not in REQUESTS and route not in STREAMING):
+            ok = False
+            print(f"NO BUDGET  {route[0]} {route[1]}")
+
+    phases = []
+    try:
+        with TestClient(main.app) as client:
+            token = client.post("/api/login", data=admin).json()["access_token"]
+            client.headers["Authorization"] = f"Bearer {token}"
+            seeded = 0
+            for phase, size in enumerate(DATASET_SIZES, start=1):
+                seed(size - seeded, doctors=2, patients=10, random_seed=phase)
+                seeded = size
+                phases.append(measure(client, routes, _context(phase, admin), counter))
+    finally:
+        shutdown_hash_executor()
+
+    for route in routes:
+        if route in STREAMING:
+            print(f"{'SKIP':5s} {route[0]} {route[1]:48s} stream")
+            continue
+        if route not in BUDGETS or route not in REQUESTS:
+            continue
+        counts = [phase[route][0] for phase in phases]
+        statuses = [phase[route][1] for phase in phases]
+        label = f"{route[0]} {route[1]}"
+        problems = []
+        if any(code >= 400 for code in statuses):
+            problems.append(f"status {statuses}")
+        if max(counts) > BUDGETS[route]:
+            problems.append(f"over budget {BUDGETS[route]}")
+        if len(set(counts)) > 1:
+            problems.append("grows with data")
+        if problems:
+            ok = False
+        print(f"{'FAIL' if problems else 'OK':5s} {label:52s} queries {counts}  {'; '.join(problems)}")
+    return ok
+
+
+def main() -> int:
+    # Never run against a real database: routes are called with writes and deletes
+    workdir = tempfile.mkdtemp(prefix="query-budget-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'budget.db')}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    return 0 if check() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Büyük randevu listeleri için hızlı JSON yanıt yolu.
+
+Varsayılan yolda her satır ORM nesnesi olarak yüklenir, AppointmentResponse
+oluşturulur ve FastAPI response_model ile bir kez daha doğrulayıp
+serileştirir. FAST_JSON_RESPONSES=true iken liste uç noktaları satırları
+doğrudan sütun tuple'ları olarak okur, AppointmentResponse ile aynı
+alanlara sahip sözlüklere çevirir ve orjson ile yazar. Değerler
+veritabanından geldiği için ikinci bir doğrulama yapılmaz.
+
+orjson kurulu değilse standart json modülü kullanılır. Ölçüm için:
+
+    python serialization_benchmark.py --rows 10000
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+import json
+import os
+
+from sqlalchemy import Select, select
+from starlette.responses import Response
+
+import models
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+
+def _default(value: Any):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} JSON'a çevrilemez")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """Doğrulanmış içeriği response_model'i atlayarak yazar"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def appointment_rows_query(appointment=models.Appointment) -> Select:
+    """appointment_query() ile aynı satırlar, ORM nesnesi yerine sütun olarak.
+
+    appointment: models.Appointment veya models.ArchivedAppointment
+    """
+    return select(
+        appointment.id,
+        appointment.patient_id,
+        appointment.doctor_id,
+        appointment.service_id,
+        appointment.appointment_date,
+        appointment.appointment_time,
+        appointment.status,
+        appointment.notes,
+        appointment.updated_at,
+        models.Doctor.first_name.label("doctor_first_name"),
+        models.Doctor.last_name.label("doctor_last_name"),
+        models.Patient.first_name.label("patient_first_name"),
+        models.Patient.last_name.label("patient_last_name"),
+        models.Service.name.label("service_name"),
+    ).outerjoin(
+        models.Doctor, models.Doctor.id == appointment.doctor_id
+    ).outerjoin(
+        models.Patient, models.Patient.id == appointment.patient_id
+    ).outerjoin(
+        models.Service, models.Service.id == appointment.service_id
+    )
+
+
+def appointment_row(row) -> dict:
+    """appointment_rows_query() satırı -> AppointmentResponse ile aynı JSON alanları"""
+    # Columns a caller appends after these (e.g. change_seq) are not part of the response
+    (appointment_id, patient_id, doctor_id, service_id, appointment_date, appointment_time, status, notes,
+     updated_at, doctor_first_name, doctor_last_name, patient_first_name, patient_last_name, service_name,
+     *_) = row
+    return {
+        "id": appointment_id,
+        "patient_id": patient_id,
+        "doctor_id": doctor_id,
+        "service_id": service_id,
+        "appointment_date": appointment_date,
+        "appointment_time": appointment_time,
+        "status": status,
+        "notes": notes,
+        "doctor_name": f"{doctor_first_name} {doctor_last_name}" if doctor_first_name is not None else None,
+        "patient_name": f"{patient_first_name} {patient_last_name}" if patient_first_name is not None else None,
+        "service_name": service_name,
+        "updated_at": updated_at,
+    }
@@ -0,0 +1,156 @@
+"""Randevu listesi serileştirme mikro benchmark'ı.
+
+get_all_appointments'ın iki yolunu aynı N satır üzerinde ölçer:
+
+- default: ORM nesneleri (joinedload) -> AppointmentResponse.from_orm ->
+  AppointmentPage -> FastAPI response_model doğrulama/serileştirme -> JSONResponse
+- fast: sütun tuple'ları -> sözlük -> orjson (FAST_JSON_RESPONSES=true)
+
+Her aşama (veritabanından okuma, yanıt gövdesini üretme) ayrı ölçülür ve
+satır başına mikro saniye olarak raporlanır. Veri geçici bir SQLite
+veritabanına seed.py ile eklenir; iki yolun ürettiği JSON'un aynı olduğu
+da kontrol edilir.
+
+    python serialization_benchmark.py --rows 10000 --repeat 5 --output serialization.json
+"""
+from datetime import datetime
+from typing import Callable, Dict, List
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+
+async def _timed(repeat: int, run: Callable) -> Dict[str, float]:
+    """run() -> {aşama: saniye}; her aşamanın medyanı döner"""
+    samples: Dict[str, List[float]] = {}
+    for _ in range(repeat):
+        for stage, seconds in (await run()).items():
+            samples.setdefault(stage, []).append(seconds)
+    return {stage: statistics.median(values) for stage, values in samples.items()}
+
+
+async def measure(rows: int, repeat: int) -> dict:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from sqlalchemy import select
+
+    import main
+    import models
+    import serialization
+    from database import AsyncSessionLocal
+
+    route = next(
+        route for route in main.app.routes
+        if getattr(route, "path", None) == "/api/appointments" and "GET" in route.methods
+    )
+    order = (
+        models.Appointment.appointment_date.desc(),
+        models.Appointment.appointment_time.desc(),
+        models.Appointment.id.desc(),
+    )
+    bodies = {}
+
+    async def default_path():
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            appointments = (await db.scalars(main.appointment_query().order_by(*order).limit(rows))).all()
+            fetched = time.perf_counter()
+            page = main.AppointmentPage(
+                items=[main.appointment_response(apt) for apt in appointments], next_cursor=None,
+            )
+            content = await serialize_response(field=route.response_field, response_content=page)
+            bodies["default"] = JSONResponse(content).body
+            finished = time.perf_counter()
+        return {"fetch": fetched - started, "serialize": finished - fetched}
+
+    async def fast_path():
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            appointments = (await db.execute(serialization.appointment_rows_query().order_by(*order).limit(rows))).all()
+            fetched = time.perf_counter()
+            bodies["fast"] = serialization.FastJSONResponse({
+                "items": [serialization.appointment_row(row) for row in appointments], "next_cursor": None,
+            }).body
+            finished = time.perf_counter()
+        return {"fetch": fetched - started, "serialize": finished - fetched}
+
+    # Warm up both paths (statement caches, imports) before measuring
+    await default_path()
+    await fast_path()
+    results = {
+        "default": await _timed(repeat, default_path),
+        "fast": await _timed(repeat, fast_path),
+    }
+    if json.loads(bodies["default"]) != json.loads(bodies["fast"]):
+        raise SystemExit("Hızlı yol farklı JSON üretti")
+
+    returned = len(json.loads(bodies["fast"])["items"])
+    report = {}
+    for name, stages in results.items():
+        total = stages["fetch"] + stages["serialize"]
+        report[name] = {
+            "fetch_us_per_row": round(stages["fetch"] / returned * 1e6, 3),
+            "serialize_us_per_row": round(stages["serialize"] / returned * 1e6, 3),
+            "total_us_per_row": round(total / returned * 1e6, 3),
+            "total_ms": round(total * 1000, 3),
+            "body_bytes": len(bodies[name]),
+        }
+    report["speedup"] = round(report["default"]["total_ms"] / report["fast"]["total_ms"], 2)
+    report["rows"] = returned
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Randevu listesi serileştirme benchmark'ı")
+    parser.add_argument("--rows", type=int, default=10_000, help="Yanıttaki satır sayısı")
+    parser.add_argument("--repeat", type=int, default=5, help="Ölçüm tekrarı (medyan alınır)")
+    parser.add_argument("--output", help="JSON sonuç dosyası (varsayılan: stdout)")
+    args = parser.parse_args(argv)
+
+    # Always a throwaway database: the data set is generated for the run
+    workdir = tempfile.mkdtemp(prefix="serialization-benchmark-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+
+    from manage import init_db
+    from seed import seed
+    import serialization
+
+    init_db()
+    seed(args.rows, doctors=20)
+    measured = asyncio.run(measure(args.rows, args.repeat))
+
+    for name in ("default", "fast"):
+        result = measured[name]
+        print(
+            f"{name:8s} fetch {result['fetch_us_per_row']:8.2f} us/row  "
+            f"serialize {result['serialize_us_per_row']:8.2f} us/row  "
+            f"total {result['total_ms']:9.2f} ms",
+            file=sys.stderr,
+        )
+    print(f"speedup  {measured['speedup']}x for {measured['rows']} rows", file=sys.stderr)
+
+    report = {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "json_library": "orjson" if serialization.orjson is not None else "json",
+        "config": {"rows": args.rows, "repeat": args.repeat},
+        "results": measured,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""Yönetim paneli istatistikleri.
+
+appointment_daily_stats tablosu (gün, doktor, hizmet, durum) başına randevu
+sayısını ve Service.price'tan gelen geliri tutar. Randevu oluşturan veya
+durumunu değiştiren uç noktalar, kendi transaction'ları içinde tabloyu
+artımlı günceller; panel yüklemesi toplam randevu sayısıyla değil
+gösterilen gün sayısıyla orantılıdır.
+
+Gelir, hizmetin güncel fiyatıyla (sayı x fiyat) tutulur: artımlı farklar
+o anki fiyatla yazılır, fiyat değiştiğinde hizmetin satırları aynı
+transaction'da yeni fiyatla yeniden hesaplanır (reprice_service). Tabloyu
+doldurmak veya düzeltmek için:
+
+    python manage.py rebuild-stats [--from 2025-01-01] [--to 2025-12-31]
+
+Yeniden üretim arşivlenmiş randevuları da sayar (bkz. archive.py).
+"""
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import models
+from database import dialect_insert
+
+# Statuses that count towards expected revenue
+REVENUE_STATUSES = ("scheduled", "approved", "completed")
+
+StatKey = Tuple[date, int, int, str]
+
+
+def _status(value: Optional[str]) -> str:
+    return value or "scheduled"
+
+
+async def apply_deltas(db: AsyncSession, deltas: Dict[StatKey, int]) -> None:
+    """(gün, doktor, hizmet, durum) -> sayı farkı; tek upsert, commit etmez"""
+    table = models.AppointmentDailyStat.__table__
+    rows = []
+    for (day, doctor_id, service_id, status), count in deltas.items():
+        if not count:
+            continue
+        price = select(models.Service.price).where(models.Service.id == service_id).scalar_subquery()
+        rows.append({
+            "appointment_date": day,
+            "doctor_id": doctor_id,
+            "service_id": service_id,
+            "status": status,
+            "appointment_count": count,
+            "revenue": func.coalesce(price, 0) * count,
+        })
+    if not rows:
+        return
+    upsert = dialect_insert(db, table).values(rows)
+    await db.execute(upsert.on_conflict_do_update(
+        index_elements=[table.c.appointment_date, table.c.doctor_id, table.c.service_id, table.c.status],
+        set_={
+            "appointment_count": table.c.appointment_count + upsert.excluded.appointment_count,
+            "revenue": table.c.revenue + upsert.excluded.revenue,
+        },
+    ))
+
+
+async def record_created(db: AsyncSession, appointment_date: date, doctor_id: int,
+                         service_id: int, status: Optional[str] = None) -> None:
+    await apply_deltas(db, {(appointment_date, doctor_id, service_id, _status(status)): 1})
+
+
+async def record_status_changes(db: AsyncSession, changes: Iterable[Tuple[date, int, int, Optional[str]]],
+                                new_status: Optional[str]) -> None:
+    """(gün, doktor, hizmet, eski durum) satırları new_status'a geçti; tek upsert"""
+    new_status = _status(new_status)
+    deltas: Counter = Counter()
+    for day, doctor_id, service_id, old_status in changes:
+        old_status = _status(old_status)
+        if old_status == new_status:
+            continue
+        deltas[(day, doctor_id, service_id, old_status)] -= 1
+        deltas[(day, doctor_id, service_id, new_status)] += 1
+    await apply_deltas(db, deltas)
+
+
+async def reprice_service(db: AsyncSession, service_id: int) -> None:
+    """Hizmetin özet satırlarındaki geliri güncel fiyatla yeniden hesaplar; commit etmez"""
+    stat = models.AppointmentDailyStat
+    price = select(models.Service.price).where(models.Service.id == service_id).scalar_subquery()
+    await db.execute(
+        update(stat)
+        .where(stat.service_id == service_id)
+        .values(revenue=func.coalesce(price, 0) * stat.appointment_count)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def dashboard(db: AsyncSession, date_from: date, date_to: date) -> dict:
+    """Durum, doktor ve gün bazında sayılar ve gelir; tek sorgu"""
+    stat = models.AppointmentDailyStat
+    rows = (await db.execute(
+        select(
+            stat.appointment_date,
+            stat.doctor_id,
+            models.Doctor.first_name,
+            models.Doctor.last_name,
+            stat.status,
+            func.sum(stat.appointment_count),
+            func.sum(stat.revenue),
+        ).join(
+            models.Doctor, models.Doctor.id == stat.doctor_id
+        ).where(
+            stat.appointment_date >= date_from,
+            stat.appointment_date <= date_to,
+        ).group_by(
+            stat.appointment_date, stat.doctor_id, models.Doctor.first_name, models.Doctor.last_name, stat.status
+        ).order_by(stat.appointment_date, stat.doctor_id)
+    )).all()
+
+    totals = {"appointments": 0, "revenue": 0.0, "by_status": {}}
+    doctors: Dict[int, dict] = {}
+    days: Dict[date, dict] = {}
+    for day, doctor_id, first_name, last_name, status, count, revenue in rows:
+        count = int(count or 0)
+        if not count:
+            continue
+        revenue = float(revenue or 0) if status in REVENUE_STATUSES else 0.0
+        doctor = doctors.setdefault(doctor_id, {
+            "doctor_id": doctor_id,
+            "doctor_name": f"{first_name} {last_name}",
+            "appointments": 0,
+            "revenue": 0.0,
+            "by_status": {},
+        })
+        day_entry = days.setdefault(day, {"date": day.isoformat(), "appointments": 0, "by_status": {}})
+        for entry in (totals, doctor, day_entry):
+            entry["appointments"] += count
+            entry["by_status"][status] = entry["by_status"].get(status, 0) + count
+        for entry in (totals, doctor):
+            entry["revenue"] = round(entry["revenue"] + revenue, 2)
+
+    return {
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "totals": totals,
+        "by_doctor": sorted(doctors.values(), key=lambda entry: -entry["appointments"]),
+        "by_day": list(days.values()),
+    }
+
+
+def rebuild(db: Session, date_from: Optional[date] = None, date_to: Optional[date] = None) -> int:
+    """Özet tabloyu randevulardan (arşiv dahil) yeniden üretir (tek transaction); yazılan satır sayısını döner"""
+    stat = models.AppointmentDailyStat
+
+    stat_conditions = []
+    if date_from:
+        stat_conditions.append(stat.appointment_date >= date_from)
+    if date_to:
+        stat_conditions.append(stat.appointment_date <= date_to)
+
+    # Archived appointments keep counting towards their day
+    parts = []
+    for appointment in (models.Appointment, models.ArchivedAppointment):
+        conditions = [appointment.service_id.is_not(None)]
+        if date_from:
+            conditions.append(appointment.appointment_date >= date_from)
+        if date_to:
+            conditions.append(appointment.appointment_date <= date_to)
+        parts.append(select(
+            appointment.appointment_date,
+            appointment.doctor_id,
+            appointment.service_id,
+            func.coalesce(appointment.status, "scheduled").label("status"),
+        ).where(*conditions))
+    source = union_all(*parts).subquery()
+
+    db.execute(delete(stat).where(*stat_conditions))
+    result = db.execute(insert(stat).from_select(
+        ["appointment_date", "doctor_id", "service_id", "status", "appointment_count", "revenue"],
+        select(
+            source.c.appointment_date,
+            source.c.doctor_id,
+            source.c.service_id,
+            source.c.status,
+            func.count(),
+            func.coalesce(func.sum(models.Service.price), 0),
+        ).outerjoin(
+            models.Service, models.Service.id == source.c.service_id
+        ).group_by(
+            source.c.appointment_date, source.c.doctor_id, source.c.service_id, source.c.status
+        )
+    ))
+    db.commit()
+    return result.rowcount
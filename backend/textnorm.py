@@ -0,0 +1,48 @@
+"""Arama için Türkçe metin sadeleştirme.
+
+"Şükrü ÖZTÜRK", "sukru ozturk" ve "ŞÜKRÜ Öztürk" aynı biçime iner:
+küçük harf (İ/I dahil) ve ç, ğ, ı, ö, ş, ü -> c, g, i, o, s, u.
+"""
+from typing import List, Optional
+import re
+
+_FOLD = str.maketrans("çğıöşüâîû", "cgiosuaiu", "̇")
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    # "İ".lower() is "i" + combining dot; the dot is dropped by _FOLD
+    return value.replace("İ", "i").lower().translate(_FOLD)
+
+
+def digits(value: Optional[str]) -> str:
+    return _NON_DIGITS.sub("", value or "")
+
+
+def search_words(first_name: Optional[str], last_name: Optional[str],
+                 email: Optional[str], phone: Optional[str]) -> List[str]:
+    words = normalize(f"{first_name or ''} {last_name or ''}").split()
+    if email:
+        words.append(normalize(email))
+    if digits(phone):
+        words.append(digits(phone))
+    return words
+
+
+def build_search_text(first_name: Optional[str], last_name: Optional[str],
+                      email: Optional[str], phone: Optional[str]) -> str:
+    """patients.search_text değeri; baştaki boşluk kelime başı aramasını LIKE '% terim%' yapar"""
+    return " " + " ".join(search_words(first_name, last_name, email, phone))
+
+
+def search_text_default(context) -> str:
+    """Column default: tek satırlı insert'lerde ve executemany'de satır başına.
+
+    Çok satırlı VALUES (insert().values([...])) ile çalışmaz; parametre adları
+    first_name_m0 gibi olur. Orada search_text açıkça verilmelidir.
+    """
+    params = context.get_current_parameters()
+    return build_search_text(params.get("first_name"), params.get("last_name"),
+                             params.get("email"), params.get("phone"))
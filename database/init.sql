@@ -7,7 +7,8 @@ CREATE TABLE IF NOT EXISTS patients (
     email VARCHAR(255) UNIQUE NOT NULL,
     phone VARCHAR(20) NOT NULL,
     date_of_birth DATE,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC'),
+    search_text TEXT NOT NULL DEFAULT ''
 );
 
 -- Doktorlarin Tablosu
@@ -18,7 +19,7 @@ CREATE TABLE IF NOT EXISTS doctors (
     specialization VARCHAR(255),
     email VARCHAR(255) UNIQUE NOT NULL,
     phone VARCHAR(20),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC')
 );
 
 -- Hizmetler icin Tablo
@@ -28,7 +29,7 @@ CREATE TABLE IF NOT EXISTS services (
     description TEXT,
     duration_minutes INTEGER DEFAULT 30,
     price DECIMAL(10, 2),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC')
 );
 
 -- Randevular icin Tablo
@@ -41,13 +42,69 @@ CREATE TABLE IF NOT EXISTS appointments (
     appointment_time TIME NOT NULL,
     status VARCHAR(20) DEFAULT 'scheduled',
     notes TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC'),
+    updated_at TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC'),
+    change_seq BIGINT NOT NULL DEFAULT 0,
     FOREIGN KEY (patient_id) REFERENCES patients(id) ON DELETE CASCADE,
     FOREIGN KEY (doctor_id) REFERENCES doctors(id) ON DELETE CASCADE,
-    FOREIGN KEY (service_id) REFERENCES services(id) ON DELETE CASCADE,
-    CONSTRAINT unique_appointment UNIQUE (doctor_id, appointment_date, appointment_time)
+    FOREIGN KEY (service_id) REFERENCES services(id) ON DELETE CASCADE
 );
 
+-- Ayni doktor ve saat icin tek aktif randevu (iptal edilen saat tekrar alinabilir)
+CREATE UNIQUE INDEX IF NOT EXISTS unique_appointment
+    ON appointments (doctor_id, appointment_date, appointment_time)
+    WHERE status != 'cancelled';
+
+-- Admin listesi keyset sayfalama (GET /api/appointments) icin
+CREATE INDEX IF NOT EXISTS ix_appointments_listing
+    ON appointments (appointment_date, appointment_time, id);
+CREATE INDEX IF NOT EXISTS ix_appointments_doctor_listing
+    ON appointments (doctor_id, appointment_date, appointment_time, id);
+CREATE INDEX IF NOT EXISTS ix_appointments_status_listing
+    ON appointments (status, appointment_date, appointment_time, id);
+
+-- Hasta gecmisi (/api/appointments/patient, /email) icin; arsiv tarafi asagida
+CREATE INDEX IF NOT EXISTS ix_appointments_patient_history
+    ON appointments (patient_id, appointment_date);
+
+-- Degisiklik akisi (/api/appointments/changes) icin; change_seq commit sirasiyla artar
+CREATE INDEX IF NOT EXISTS ix_appointments_changes
+    ON appointments (change_seq, id);
+-- since=<ISO zaman> ve eski (updated_at, id) cursor'lari icin
+CREATE INDEX IF NOT EXISTS ix_appointments_updated_at
+    ON appointments (updated_at);
+
+CREATE TABLE IF NOT EXISTS appointment_change_counter (
+    id INTEGER PRIMARY KEY,
+    value BIGINT NOT NULL
+);
+
+-- Arsivlenmis gecmis randevular (python manage.py archive-appointments)
+CREATE TABLE IF NOT EXISTS appointments_archive (
+    id INTEGER PRIMARY KEY,
+    patient_id INTEGER NOT NULL,
+    doctor_id INTEGER NOT NULL,
+    service_id INTEGER NOT NULL,
+    appointment_date DATE NOT NULL,
+    appointment_time TIME NOT NULL,
+    status VARCHAR(20),
+    notes TEXT,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL,
+    archived_at TIMESTAMP NOT NULL,
+    FOREIGN KEY (patient_id) REFERENCES patients(id) ON DELETE CASCADE,
+    FOREIGN KEY (doctor_id) REFERENCES doctors(id) ON DELETE CASCADE,
+    FOREIGN KEY (service_id) REFERENCES services(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_appointments_archive_patient_history
+    ON appointments_archive (patient_id, appointment_date);
+
+-- Hasta aramasi (/api/patients/search) icin trigram indeksi
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS ix_patients_search_trgm
+    ON patients USING gin (search_text gin_trgm_ops);
+
 -- Varsayılan Doktorlari Ekle
 INSERT INTO doctors (first_name, last_name, specialization, email, phone) VALUES
 ('doktorad1', 'doktorsoyad1', 'Diş Hekimliği', 'doktor1@gmail.com', '+90 111 11 11'),
@@ -1,6 +1,23 @@
 import { type ClassValue, clsx } from 'clsx';
 import { twMerge } from 'tailwind-merge';
+import { AvailabilityBitmap, AvailableSlot } from '../types';
 
 export function cn(...inputs: ClassValue[]) {
     return twMerge(clsx(inputs));
 }
+
+// Bitmap müsaitlik yanıtını bir doktor için slot listesine çevirir
+export function decodeAvailability(bitmap: AvailabilityBitmap, doctorId: number): AvailableSlot[] {
+    const doctor = bitmap.doctors.find((d) => d.doctor_id === doctorId);
+    if (!doctor) return [];
+    const [hours, minutes] = bitmap.slot_start.split(':').map(Number);
+    const slots: AvailableSlot[] = [];
+    bitmap.dates.forEach((date, k) => {
+        for (let i = 0; i < bitmap.slot_count; i++) {
+            const minute = hours * 60 + minutes + i * bitmap.slot_minutes;
+            const time = `${String(Math.floor(minute / 60)).padStart(2, '0')}:${String(minute % 60).padStart(2, '0')}`;
+            slots.push({ date, time, available: ((doctor.free[k] >> i) & 1) === 1 });
+        }
+    });
+    return slots;
+}
@@ -1,16 +1,18 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { api } from '../lib/api';
-import { Doctor, Service, Appointment } from '../types';
+import { Doctor, Service, Appointment, AppointmentPage, DashboardStats, Patient, PatientSearchPage } from '../types';
 import { Button } from '../components/ui/Button';
 import { Card } from '../components/ui/Card';
 import { Input } from '../components/ui/Input';
-import { Plus, Pencil, Trash2, X, Save, CheckCircle, XCircle, Calendar } from 'lucide-react';
+import { Plus, Pencil, Trash2, X, Save, CheckCircle, XCircle, Calendar, Search } from 'lucide-react';
 
 export const Admin = () => {
-    const [activeTab, setActiveTab] = useState<'doctors' | 'services' | 'appointments'>('doctors');
+    const [activeTab, setActiveTab] = useState<'doctors' | 'services' | 'appointments' | 'patients'>('doctors');
     const [doctors, setDoctors] = useState<Doctor[]>([]);
     const [services, setServices] = useState<Service[]>([]);
     const [appointments, setAppointments] = useState<Appointment[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [stats, setStats] = useState<DashboardStats | null>(null);
     const [loading, setLoading] = useState(false);
 
     // Form states
@@ -30,21 +32,125 @@ export const Admin = () => {
         price: 0,
     });
 
+    const [patientQuery, setPatientQuery] = useState('');
+    const [patients, setPatients] = useState<Patient[]>([]);
+    const [patientCursor, setPatientCursor] = useState<string | null>(null);
+    const [selectedPatient, setSelectedPatient] = useState<Patient | null>(null);
+    const [patientHistory, setPatientHistory] = useState<Appointment[]>([]);
+
+    const statsTimer = useRef<number | undefined>(undefined);
+
     useEffect(() => {
         fetchData();
+
+        // Canlı güncellemeler: tüm listeyi yeniden çekmek yerine değişen satırı güncelle
+        const token = localStorage.getItem('token');
+        if (!token) return;
+        const source = new EventSource(`${api.defaults.baseURL}/events?token=${encodeURIComponent(token)}`);
+        source.addEventListener('appointment.created', (e) => {
+            const appointment: Appointment = JSON.parse((e as MessageEvent).data);
+            setAppointments((prev) =>
+                prev.some((a) => a.id === appointment.id) ? prev : [appointment, ...prev]
+            );
+            refreshStats();
+        });
+        source.addEventListener('appointment.status', (e) => {
+            const { id, status } = JSON.parse((e as MessageEvent).data);
+            updateAppointmentStatus(id, status);
+            refreshStats();
+        });
+        source.addEventListener('appointments.status', (e) => {
+            const { status, items } = JSON.parse((e as MessageEvent).data);
+            const ids = new Set<number>(items.map((item: { id: number }) => item.id));
+            setAppointments((prev) => prev.map((a) => (ids.has(a.id) ? { ...a, status } : a)));
+            refreshStats();
+        });
+        source.addEventListener('appointments.imported', () => {
+            refreshAppointments();
+            refreshStats();
+        });
+        return () => {
+            source.close();
+            window.clearTimeout(statsTimer.current);
+        };
     }, []);
 
+    // Hasta araması: yazmayı bırakınca tek istek
+    useEffect(() => {
+        if (activeTab !== 'patients') return;
+        const q = patientQuery.trim();
+        if (q.length < 2) {
+            setPatients([]);
+            setPatientCursor(null);
+            return;
+        }
+        const timer = window.setTimeout(() => searchPatients(q), 300);
+        return () => window.clearTimeout(timer);
+    }, [patientQuery, activeTab]);
+
+    const searchPatients = async (q: string, cursor?: string) => {
+        try {
+            const res = await api.get<PatientSearchPage>('/patients/search', {
+                params: { q, cursor },
+            });
+            setPatients((prev) => (cursor ? [...prev, ...res.data.items] : res.data.items));
+            setPatientCursor(res.data.next_cursor);
+        } catch (error) {
+            console.error('Error searching patients:', error);
+        }
+    };
+
+    const selectPatient = async (patient: Patient) => {
+        setSelectedPatient(patient);
+        try {
+            const res = await api.get<Appointment[]>(`/appointments/patient/${patient.id}`);
+            setPatientHistory(res.data);
+        } catch (error) {
+            console.error('Error fetching patient appointments:', error);
+        }
+    };
+
+    const updateAppointmentStatus = (id: number, status: string) => {
+        setAppointments((prev) => prev.map((a) => (a.id === id ? { ...a, status } : a)));
+    };
+
+    // Olay yoğunluğunda istatistikler tek istekle yenilenir
+    const refreshStats = () => {
+        window.clearTimeout(statsTimer.current);
+        statsTimer.current = window.setTimeout(async () => {
+            try {
+                const res = await api.get<DashboardStats>('/dashboard/stats');
+                setStats(res.data);
+            } catch (error) {
+                console.error('Error fetching stats:', error);
+            }
+        }, 500);
+    };
+
+    const refreshAppointments = async () => {
+        try {
+            const res = await api.get<AppointmentPage>('/appointments');
+            setAppointments(res.data.items);
+            setNextCursor(res.data.next_cursor);
+        } catch (error) {
+            console.error('Error fetching appointments:', error);
+        }
+    };
+
     const fetchData = async () => {
         setLoading(true);
         try {
-            const [doctorsRes, servicesRes, appointmentsRes] = await Promise.all([
+            const [doctorsRes, servicesRes, appointmentsRes, statsRes] = await Promise.all([
                 api.get<Doctor[]>('/doctors'),
                 api.get<Service[]>('/services'),
-                api.get<Appointment[]>('/appointments'),
+                api.get<AppointmentPage>('/appointments'),
+                api.get<DashboardStats>('/dashboard/stats'),
             ]);
             setDoctors(doctorsRes.data);
             setServices(servicesRes.data);
-            setAppointments(appointmentsRes.data);
+            setAppointments(appointmentsRes.data.items);
+            setNextCursor(appointmentsRes.data.next_cursor);
+            setStats(statsRes.data);
         } catch (error) {
             console.error('Error fetching data:', error);
         } finally {
@@ -52,6 +158,22 @@ export const Admin = () => {
         }
     };
 
+    const loadMoreAppointments = async () => {
+        if (!nextCursor) return;
+        setLoading(true);
+        try {
+            const res = await api.get<AppointmentPage>('/appointments', {
+                params: { cursor: nextCursor },
+            });
+            setAppointments((prev) => [...prev, ...res.data.items]);
+            setNextCursor(res.data.next_cursor);
+        } catch (error) {
+            console.error('Error fetching appointments:', error);
+        } finally {
+            setLoading(false);
+        }
+    };
+
     const handleDoctorSubmit = async (e: React.FormEvent) => {
         e.preventDefault();
         try {
@@ -150,7 +272,8 @@ export const Admin = () => {
     const handleApproveAppointment = async (id: number) => {
         try {
             await api.put(`/appointments/${id}/approve`);
-            fetchData();
+            updateAppointmentStatus(id, 'approved');
+            refreshStats();
         } catch (error) {
             console.error('Error approving appointment:', error);
             alert('Randevu onaylanırken hata oluştu.');
@@ -161,18 +284,41 @@ export const Admin = () => {
         if (!window.confirm('Bu randevuyu reddetmek istediğinize emin misiniz?')) return;
         try {
             await api.put(`/appointments/${id}/reject`);
-            fetchData();
+            updateAppointmentStatus(id, 'rejected');
+            refreshStats();
         } catch (error) {
             console.error('Error rejecting appointment:', error);
             alert('Randevu reddedilirken hata oluştu.');
         }
     };
 
+    // Onay bekleyen tüm yüklü randevular tek istekle onaylanır
+    const pendingAppointments = appointments.filter((a) => a.status === 'pending' || a.status === 'scheduled');
+
+    const handleApproveAllPending = async () => {
+        if (!window.confirm(`${pendingAppointments.length} randevuyu onaylamak istediğinize emin misiniz?`)) return;
+        try {
+            const res = await api.post<{ results: { id: number; outcome: string; status: string | null }[] }>(
+                '/appointments/bulk-status',
+                { ids: pendingAppointments.map((a) => a.id), status: 'approved' }
+            );
+            const statuses = new Map(res.data.results.map((r) => [r.id, r.status]));
+            setAppointments((prev) =>
+                prev.map((a) => (statuses.get(a.id) ? { ...a, status: statuses.get(a.id) as string } : a))
+            );
+            refreshStats();
+        } catch (error) {
+            console.error('Error approving appointments:', error);
+            alert('Randevular onaylanırken hata oluştu.');
+        }
+    };
+
     const handleDeleteAppointment = async (id: number) => {
         if (!window.confirm('Bu randevuyu silmek istediğinize emin misiniz?')) return;
         try {
             await api.delete(`/appointments/${id}`);
-            fetchData();
+            updateAppointmentStatus(id, 'cancelled');
+            refreshStats();
         } catch (error) {
             console.error('Error deleting appointment:', error);
             alert('Randevu silinirken hata oluştu.');
@@ -217,11 +363,42 @@ export const Admin = () => {
                     <Calendar className="w-4 h-4 mr-2" />
                     Randevular
                 </Button>
+                <Button
+                    variant={activeTab === 'patients' ? 'primary' : 'outline'}
+                    onClick={() => { setActiveTab('patients'); resetForm(); }}
+                >
+                    <Search className="w-4 h-4 mr-2" />
+                    Hastalar
+                </Button>
             </div>
 
+            {activeTab === 'appointments' && stats && (
+                <div className="grid gap-4 md:grid-cols-4 mb-8">
+                    <Card className="p-4">
+                        <p className="text-sm text-neutral-500">Toplam Randevu</p>
+                        <p className="text-2xl font-bold">{stats.totals.appointments}</p>
+                    </Card>
+                    <Card className="p-4">
+                        <p className="text-sm text-neutral-500">Beklenen Gelir</p>
+                        <p className="text-2xl font-bold text-primary-600">₺{stats.totals.revenue.toLocaleString('tr-TR')}</p>
+                    </Card>
+                    <Card className="p-4 md:col-span-2">
+                        <p className="text-sm text-neutral-500 mb-2">Durumlara Göre</p>
+                        <div className="flex flex-wrap gap-2">
+                            {Object.entries(stats.totals.by_status).map(([status, count]) => (
+                                <span key={status} className="flex items-center gap-1">
+                                    {getStatusBadge(status)}
+                                    <span className="font-medium">{count}</span>
+                                </span>
+                            ))}
+                        </div>
+                    </Card>
+                </div>
+            )}
+
             <div className="grid gap-8 lg:grid-cols-3">
                 {/* Form Section */}
-                {activeTab !== 'appointments' && (
+                {(activeTab === 'doctors' || activeTab === 'services') && (
                 <Card className="p-6 h-fit lg:col-span-1">
                     <h2 className="text-xl font-bold mb-4">
                         {isEditing ? 'Düzenle' : 'Yeni Ekle'}
@@ -315,7 +492,62 @@ export const Admin = () => {
                 )}
 
                 {/* List Section */}
+                {activeTab === 'patients' && (
+                <div className="lg:col-span-3 grid gap-8 lg:grid-cols-2">
+                    <div className="space-y-4">
+                        <Input
+                            placeholder="Ad, soyad, e-posta veya telefon"
+                            value={patientQuery}
+                            onChange={(e) => setPatientQuery(e.target.value)}
+                        />
+                        {patients.map((patient) => (
+                            <Card
+                                key={patient.id}
+                                className={`p-4 cursor-pointer ${selectedPatient?.id === patient.id ? 'border-primary-500' : ''}`}
+                                onClick={() => selectPatient(patient)}
+                            >
+                                <h3 className="font-bold">{patient.first_name} {patient.last_name}</h3>
+                                <p className="text-sm text-neutral-500">{patient.email} · {patient.phone}</p>
+                            </Card>
+                        ))}
+                        {patientCursor && (
+                            <div className="flex justify-center">
+                                <Button variant="outline" onClick={() => searchPatients(patientQuery.trim(), patientCursor)}>
+                                    Daha Fazla Yükle
+                                </Button>
+                            </div>
+                        )}
+                    </div>
+                    {selectedPatient && (
+                        <Card className="p-6 h-fit space-y-3">
+                            <h2 className="text-xl font-bold">{selectedPatient.first_name} {selectedPatient.last_name}</h2>
+                            {patientHistory.length === 0 ? (
+                                <p className="text-neutral-500">Randevu bulunamadı</p>
+                            ) : (
+                                patientHistory.map((appointment) => (
+                                    <div key={appointment.id} className="flex items-center justify-between text-sm border-b pb-2">
+                                        <span>
+                                            {new Date(appointment.appointment_date).toLocaleDateString('tr-TR')} {appointment.appointment_time} · {appointment.service_name} · {appointment.doctor_name}
+                                        </span>
+                                        {getStatusBadge(appointment.status)}
+                                    </div>
+                                ))
+                            )}
+                        </Card>
+                    )}
+                </div>
+                )}
+
+                {activeTab !== 'patients' && (
                 <div className={activeTab === 'appointments' ? 'lg:col-span-3 space-y-4' : 'lg:col-span-2 space-y-4'}>
+                    {activeTab === 'appointments' && pendingAppointments.length > 0 && (
+                        <div className="flex justify-end">
+                            <Button variant="outline" className="text-green-600 hover:text-green-700" onClick={handleApproveAllPending}>
+                                <CheckCircle className="w-4 h-4 mr-2" />
+                                Bekleyenleri Onayla ({pendingAppointments.length})
+                            </Button>
+                        </div>
+                    )}
                     {activeTab === 'doctors' ? (
                         doctors.map((doctor) => (
                             <Card key={doctor.id} className="p-4 flex items-center justify-between">
@@ -421,7 +653,15 @@ export const Admin = () => {
                             </Card>
                         ))
                     )}
+                    {activeTab === 'appointments' && nextCursor && (
+                        <div className="flex justify-center">
+                            <Button variant="outline" onClick={loadMoreAppointments} disabled={loading}>
+                                Daha Fazla Yükle
+                            </Button>
+                        </div>
+                    )}
                 </div>
+                )}
             </div>
         </div>
     );
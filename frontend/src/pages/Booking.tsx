@@ -1,12 +1,12 @@
 import React, { useState, useEffect } from 'react';
 import { useSearchParams, useNavigate } from 'react-router-dom';
 import { api } from '../lib/api';
-import { Doctor, AvailableSlot, Service } from '../types';
+import { Doctor, AvailableSlot, AvailabilityBitmap, Service } from '../types';
 import { Button } from '../components/ui/Button';
 import { Card } from '../components/ui/Card';
 import { Input } from '../components/ui/Input';
 import { User, Calendar as CalendarIcon, CheckCircle, ChevronLeft, ChevronRight, Star } from 'lucide-react';
-import { cn } from '../lib/utils';
+import { cn, decodeAvailability } from '../lib/utils';
 
 export const Booking = () => {
     const [searchParams] = useSearchParams();
@@ -64,14 +64,16 @@ export const Booking = () => {
             const fetchSlots = async () => {
                 setLoading(true);
                 try {
-                    const res = await api.get<AvailableSlot[]>('/appointments/available', {
+                    const res = await api.get<AvailabilityBitmap>('/appointments/available', {
                         params: {
                             doctor_id: selectedDoctor.id,
                             start_date: selectedDate,
                             end_date: selectedDate,
+                            service_id: selectedService?.id,
+                            format: 'bitmap',
                         }
                     });
-                    setAvailableSlots(res.data);
+                    setAvailableSlots(decodeAvailability(res.data, selectedDoctor.id));
                 } catch (error) {
                     console.error('Error fetching slots:', error);
                 } finally {
@@ -80,7 +82,7 @@ export const Booking = () => {
             };
             fetchSlots();
         }
-    }, [selectedDoctor, selectedDate]);
+    }, [selectedDoctor, selectedDate, selectedService]);
 
     const handleDateChange = (e: React.ChangeEvent<HTMLInputElement>) => {
         setSelectedDate(e.target.value);
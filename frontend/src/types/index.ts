@@ -29,8 +29,58 @@ export interface Appointment {
     service_name?: string;
 }
 
+export interface AppointmentPage {
+    items: Appointment[];
+    next_cursor: string | null;
+}
+
+export interface Patient {
+    id: number;
+    first_name: string;
+    last_name: string;
+    email: string;
+    phone: string;
+}
+
+export interface PatientSearchPage {
+    items: Patient[];
+    next_cursor: string | null;
+}
+
 export interface AvailableSlot {
     date: string;
     time: string;
     available: boolean;
 }
+
+// /appointments/available?format=bitmap: bit i of free[k] = slot i on dates[k]
+export interface AvailabilityBitmap {
+    format: 'bitmap';
+    slot_start: string;
+    slot_minutes: number;
+    slot_count: number;
+    dates: string[];
+    doctors: { doctor_id: number; free: number[] }[];
+}
+
+export interface DashboardStats {
+    date_from: string;
+    date_to: string;
+    totals: {
+        appointments: number;
+        revenue: number;
+        by_status: Record<string, number>;
+    };
+    by_doctor: {
+        doctor_id: number;
+        doctor_name: string;
+        appointments: number;
+        revenue: number;
+        by_status: Record<string, number>;
+    }[];
+    by_day: {
+        date: string;
+        appointments: number;
+        by_status: Record<string, number>;
+    }[];
+}